@@ -1,4 +1,6 @@
 from sqladmin import ModelView, Admin
+from sqlalchemy import insert, select
+from sqlalchemy.orm import load_only
 
 from db.db import AsyncSessionLocal, engine
 from db.models import (
@@ -14,6 +16,7 @@ from db.models import (
     Event,
     EventInvitation,
 )
+from service.utils import clear_category_cache
 
 
 class BlacklistedTokenAdmin(ModelView, model=BlacklistedToken):
@@ -78,6 +81,10 @@ class UserAdmin(ModelView, model=User):
         User.sent_invitations,
     ]
 
+    def list_query(self, request):
+        # в списке не загружаем password_hash и contact_data
+        return select(User).options(load_only(*self.column_list))
+
 
 class ContractorAdmin(ModelView, model=Contractor):
     column_list = [
@@ -127,29 +134,27 @@ class ContractorAdmin(ModelView, model=Contractor):
         portfolio_data = data.pop("portfolio_items", [])
 
         async with AsyncSessionLocal() as db:
-            try:
+            async with db.begin():
                 user = User(**user_data)
                 db.add(user)
-                await db.commit()
+                await db.flush()
 
                 contractor = Contractor(user_id=user.id, **data)
                 db.add(contractor)
-                await db.commit()
-
-                for service_data in services_data:
-                    service = ContractorService(contractor_id=contractor.id,
-                                                **service_data)
-                    db.add(service)
-
-                for item_data in portfolio_data:
-                    item = PortfolioItem(contractor_id=contractor.id,
-                                         **item_data)
-                    db.add(item)
-
-                await db.commit()
-            except Exception as e:
-                await db.rollback()
-                raise e
+                await db.flush()
+
+                if services_data:
+                    await db.execute(
+                        insert(ContractorService),
+                        [{"contractor_id": contractor.id, **service_data}
+                         for service_data in services_data]
+                    )
+                if portfolio_data:
+                    await db.execute(
+                        insert(PortfolioItem),
+                        [{"contractor_id": contractor.id, **item_data}
+                         for item_data in portfolio_data]
+                    )
 
 
 class ContractorServiceAdmin(ModelView, model=ContractorService):
@@ -262,21 +267,25 @@ class CategoryAdmin(ModelView, model=Category):
         services = data.pop("services", [])
 
         async with AsyncSessionLocal() as db:
-            try:
+            async with db.begin():
                 category = Category(**data)
                 db.add(category)
-                await db.commit()
+                await db.flush()
 
-                for service_data in services:
-                    service = Service(category_id=category.id,
-                                      **service_data)
-                    db.add(service)
+                if services:
+                    await db.execute(
+                        insert(Service),
+                        [{"category_id": category.id, **service_data}
+                         for service_data in services]
+                    )
+            clear_category_cache()
+            return category
 
-                await db.commit()
-                return category
-            except Exception as e:
-                await db.rollback()
-                raise e
+    async def after_model_change(self, data, model, is_created, request):
+        clear_category_cache()
+
+    async def after_model_delete(self, model, request):
+        clear_category_cache()
 
 
 class ServiceAdmin(ModelView, model=Service):
@@ -384,16 +393,22 @@ class EventInvitationAdmin(ModelView, model=EventInvitation):
     ]
 
 
+ADMIN_VIEWS = (
+    BlacklistedTokenAdmin,
+    UserAdmin,
+    ContractorAdmin,
+    ContractorServiceAdmin,
+    PortfolioItemAdmin,
+    ReviewAdmin,
+    CategoryAdmin,
+    ServiceAdmin,
+    EventAdmin,
+    EventInvitationAdmin,
+)
+
+
 def setup_admin(app):
     admin = Admin(app, engine)
 
-    admin.add_view(BlacklistedTokenAdmin)
-    admin.add_view(UserAdmin)
-    admin.add_view(ContractorAdmin)
-    admin.add_view(ContractorServiceAdmin)
-    admin.add_view(PortfolioItemAdmin)
-    admin.add_view(ReviewAdmin)
-    admin.add_view(CategoryAdmin)
-    admin.add_view(ServiceAdmin)
-    admin.add_view(EventAdmin)
-    admin.add_view(EventInvitationAdmin)
+    for view in ADMIN_VIEWS:
+        admin.add_view(view)
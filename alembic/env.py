@@ -26,10 +26,6 @@ DATABASE_URL = "postgresql+asyncpg://{}:{}@{}:{}/{}".format(
 config.set_main_option("sqlalchemy.url", DATABASE_URL)
 
 
-connectable = create_async_engine(config.get_main_option("sqlalchemy.url"),
-                                  poolclass=pool.AsyncAdaptedQueuePool)
-
-
 def run_migrations_offline():
     context.configure(
         url=DATABASE_URL, target_metadata=Base.metadata, literal_binds=True
@@ -39,8 +35,13 @@ def run_migrations_offline():
 
 
 async def run_migrations_online():
+    connectable = create_async_engine(
+        config.get_main_option("sqlalchemy.url"),
+        poolclass=pool.NullPool,
+    )
     async with connectable.connect() as connection:
         await connection.run_sync(do_run_migrations)
+    await connectable.dispose()
 
 
 def do_run_migrations(connection):
@@ -0,0 +1,38 @@
+"""Store SHA-256 digests of blacklisted tokens.
+
+Revision ID: 3b8f1c2d9a47
+Revises: efcd5efb2343
+Create Date: 2026-10-15 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8f1c2d9a47'
+down_revision: Union[str, None] = 'efcd5efb2343'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "UPDATE blacklisted_token "
+        "SET token = encode(sha256(convert_to(token, 'UTF8')), 'hex')"
+    )
+    op.alter_column('blacklisted_token', 'token',
+                    existing_type=sa.String(),
+                    type_=sa.String(length=64),
+                    existing_nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('blacklisted_token', 'token',
+                    existing_type=sa.String(length=64),
+                    type_=sa.String(),
+                    existing_nullable=False)
@@ -0,0 +1,50 @@
+"""Generate timestamp defaults on the server.
+
+Revision ID: 5d2a8e6c0f13
+Revises: 9c4e7a1f5b20
+Create Date: 2026-10-15 11:40:52.803117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a8e6c0f13'
+down_revision: Union[str, None] = '9c4e7a1f5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMESTAMP_COLUMNS = (
+    ('users', 'created_at'),
+    ('users', 'updated_at'),
+    ('contractor', 'created_at'),
+    ('contractor', 'updated_at'),
+    ('portfolio_item', 'created_at'),
+    ('portfolio_item', 'updated_at'),
+    ('review', 'created_at'),
+    ('event', 'created_at'),
+    ('event', 'updated_at'),
+    ('event_invitation', 'created_at'),
+    ('event_invitation', 'updated_at'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column,
+                        existing_type=sa.DateTime(timezone=True),
+                        server_default=sa.func.now(),
+                        existing_nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column,
+                        existing_type=sa.DateTime(timezone=True),
+                        server_default=None,
+                        existing_nullable=True)
@@ -0,0 +1,36 @@
+"""Store blacklisted token digests as bytea.
+
+Revision ID: 7f1b3d5e9a62
+Revises: 5d2a8e6c0f13
+Create Date: 2026-10-15 12:05:33.174460
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f1b3d5e9a62'
+down_revision: Union[str, None] = '5d2a8e6c0f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('blacklisted_token', 'token',
+                    existing_type=sa.String(length=64),
+                    type_=sa.LargeBinary(length=32),
+                    existing_nullable=False,
+                    postgresql_using="decode(token, 'hex')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('blacklisted_token', 'token',
+                    existing_type=sa.LargeBinary(length=32),
+                    type_=sa.String(length=64),
+                    existing_nullable=False,
+                    postgresql_using="encode(token, 'hex')")
@@ -0,0 +1,28 @@
+"""Add unique index on users.username.
+
+Revision ID: 9c4e7a1f5b20
+Revises: 3b8f1c2d9a47
+Create Date: 2026-10-15 11:02:17.546093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e7a1f5b20'
+down_revision: Union[str, None] = '3b8f1c2d9a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_users_username'), 'users', ['username'],
+                    unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_username'), table_name='users')
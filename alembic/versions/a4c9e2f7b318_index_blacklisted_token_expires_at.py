@@ -0,0 +1,29 @@
+"""Index blacklisted_token.expires_at.
+
+Revision ID: a4c9e2f7b318
+Revises: 7f1b3d5e9a62
+Create Date: 2026-10-15 12:31:08.927415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c9e2f7b318'
+down_revision: Union[str, None] = '7f1b3d5e9a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_blacklisted_token_expires_at'),
+                    'blacklisted_token', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_blacklisted_token_expires_at'),
+                  table_name='blacklisted_token')
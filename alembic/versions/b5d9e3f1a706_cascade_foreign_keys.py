@@ -0,0 +1,53 @@
+"""Cascade deletes through foreign keys in the database.
+
+Revision ID: b5d9e3f1a706
+Revises: f3a7c1e9b254
+Create Date: 2026-10-15 19:12:47.902135
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d9e3f1a706'
+down_revision: Union[str, None] = 'f3a7c1e9b254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (таблица, столбец, таблица, на которую ссылается внешний ключ);
+# ограничения созданы без имени, поэтому имеют имена PostgreSQL
+# по умолчанию: <таблица>_<столбец>_fkey
+FOREIGN_KEYS = [
+    ('contractor', 'user_id', 'users'),
+    ('event', 'user_id', 'users'),
+    ('event', 'organizer_id', 'users'),
+    ('service', 'category_id', 'category'),
+    ('contractor_service', 'contractor_id', 'contractor'),
+    ('contractor_service', 'service_id', 'service'),
+    ('event_invitation', 'event_id', 'event'),
+    ('event_invitation', 'recipient_id', 'contractor'),
+    ('event_invitation', 'sender_id', 'users'),
+    ('portfolio_item', 'contractor_id', 'contractor'),
+    ('review', 'contractor_id', 'contractor'),
+    ('review', 'user_id', 'users'),
+]
+
+
+def _recreate_foreign_keys(ondelete: Union[str, None]) -> None:
+    for table, column, referent in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referent, [column], ['id'],
+                              ondelete=ondelete)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _recreate_foreign_keys('CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recreate_foreign_keys(None)
@@ -0,0 +1,38 @@
+"""Unique event_invitation (event_id, recipient_id).
+
+Revision ID: c7e3a9d1f428
+Revises: a4c9e2f7b318
+Create Date: 2026-10-15 14:02:47.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e3a9d1f428'
+down_revision: Union[str, None] = 'a4c9e2f7b318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # оставляем самое раннее приглашение для каждой пары
+    # мероприятие - подрядчик
+    op.execute(
+        "DELETE FROM event_invitation a "
+        "USING event_invitation b "
+        "WHERE a.event_id = b.event_id "
+        "AND a.recipient_id = b.recipient_id "
+        "AND a.id > b.id"
+    )
+    op.create_unique_constraint('uq_event_recipient', 'event_invitation',
+                                ['event_id', 'recipient_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_event_recipient', 'event_invitation',
+                       type_='unique')
@@ -0,0 +1,43 @@
+"""Indexes for event, contractor and contractor_service list queries.
+
+Revision ID: e2b6f4a8c591
+Revises: c7e3a9d1f428
+Create Date: 2026-10-15 15:26:39.504117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b6f4a8c591'
+down_revision: Union[str, None] = 'c7e3a9d1f428'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_event_user_created', 'event',
+                    ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_event_org_created', 'event',
+                    ['organizer_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_event_created', 'event',
+                    ['created_at', 'id'], unique=False)
+    op.create_index('ix_contractor_service_service', 'contractor_service',
+                    ['service_id', 'contractor_id'], unique=False)
+    op.create_index('ix_contractor_rating', 'contractor',
+                    [sa.text('coalesce(average_rating, 0)'), 'id'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contractor_rating', table_name='contractor')
+    op.drop_index('ix_contractor_service_service',
+                  table_name='contractor_service')
+    op.drop_index('ix_event_created', table_name='event')
+    op.drop_index('ix_event_org_created', table_name='event')
+    op.drop_index('ix_event_user_created', table_name='event')
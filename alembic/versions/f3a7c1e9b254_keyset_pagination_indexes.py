@@ -0,0 +1,41 @@
+"""Indexes for user, contractor, portfolio and review list queries.
+
+Revision ID: f3a7c1e9b254
+Revises: e2b6f4a8c591
+Create Date: 2026-10-15 18:04:12.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a7c1e9b254'
+down_revision: Union[str, None] = 'e2b6f4a8c591'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_role_updated', 'users',
+                    ['role', 'updated_at', 'id'], unique=False)
+    op.create_index('ix_users_role_name', 'users',
+                    ['role', 'name', 'id'], unique=False)
+    op.create_index('ix_contractor_approved_created', 'contractor',
+                    ['is_approved', 'created_at', 'id'], unique=False)
+    op.create_index('ix_portfolio_item_contractor_updated', 'portfolio_item',
+                    ['contractor_id', 'updated_at', 'id'], unique=False)
+    op.create_index('ix_review_contractor_created', 'review',
+                    ['contractor_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_review_contractor_created', table_name='review')
+    op.drop_index('ix_portfolio_item_contractor_updated',
+                  table_name='portfolio_item')
+    op.drop_index('ix_contractor_approved_created', table_name='contractor')
+    op.drop_index('ix_users_role_name', table_name='users')
+    op.drop_index('ix_users_role_updated', table_name='users')
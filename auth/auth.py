@@ -1,4 +1,11 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -7,56 +14,180 @@ from dotenv import load_dotenv
 from fastapi import Request, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy import exists
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi.responses import JSONResponse
 
+from auth.blacklist import (
+    is_token_blacklisted,
+    add_to_blacklist,
+    hash_token,
+)
 from db.models import BlacklistedToken, User, UserRole
 
 load_dotenv()
 
 JWT_SECRET = os.environ["SECRET_KEY"]
 JWT_ALGORITHM = "HS256"
+JWT_ALGORITHMS = [JWT_ALGORITHM]
 ACCESS_TOKEN_EXPIRE = timedelta(hours=1)
 REFRESH_TOKEN_EXPIRE = timedelta(days=7)
+TOKEN_CACHE_MAXSIZE = 10_000
+USER_STATUS_CACHE_TTL = 60
+USER_STATUS_CACHE_MAXSIZE = 5_000
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.environ.get(
+    "PASSWORD_HASH_WORKERS", min(32, (os.cpu_count() or 1) * 2)
+))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# отдельный ограниченный пул потоков для bcrypt, чтобы всплеск логинов
+# не занимал общий пул потоков приложения
+_password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pwhash"
+)
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+# декодированные payload'ы токенов, хранятся до истечения срока действия
+_token_payload_cache: dict[str, dict] = {}
+# статус активности пользователей для /refresh: user_id -> (is_active, до)
+_user_status_cache: dict[int, tuple[bool, float]] = {}
 
 
-def check_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+async def hash_password(password: str) -> str:
+    """
+    Хэширует пароль в пуле потоков для bcrypt, чтобы не блокировать
+    event loop.
+    """
+    loop = asyncio.get_running_loop()
+    hashed = await loop.run_in_executor(
+        _password_executor,
+        bcrypt.hashpw, password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    )
+    return hashed.decode()
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Проверяет пароль в пуле потоков для bcrypt, чтобы не блокировать
+    event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor,
+        bcrypt.checkpw, plain_password.encode(), hashed_password.encode()
+    )
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Проверяет, что хэш пароля создан с числом раундов bcrypt,
+    отличным от текущей настройки BCRYPT_ROUNDS.
+    """
+    return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+_JWT_KEY = JWT_SECRET.encode()
+_JWT_HEADER_SEGMENT = _b64url(
+    json.dumps({"alg": JWT_ALGORITHM, "typ": "JWT"},
+               separators=(",", ":")).encode()
+)
+
+
+def encode_token(payload: dict) -> str:
+    """
+    Подписывает payload алгоритмом HS256. Заголовок токена
+    сериализуется один раз при импорте модуля.
+    """
+    signing_input = _JWT_HEADER_SEGMENT + b"." + _b64url(
+        json.dumps(payload, separators=(",", ":")).encode()
+    )
+    signature = hmac.new(_JWT_KEY, signing_input, hashlib.sha256).digest()
+    return (signing_input + b"." + _b64url(signature)).decode()
 
 
 def create_access_token(data: dict) -> str:
+    expires_at = datetime.now(timezone.utc) + ACCESS_TOKEN_EXPIRE
     payload = {
         "user_id": data["user_id"],
         "is_active": data["is_active"],
-        "exp": datetime.now(timezone.utc) + ACCESS_TOKEN_EXPIRE,
+        "exp": int(expires_at.timestamp()),
         "type": "access"
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return encode_token(payload)
 
 
 def create_refresh_token(data: dict) -> str:
+    expires_at = datetime.now(timezone.utc) + REFRESH_TOKEN_EXPIRE
     payload = {
         "user_id": data["user_id"],
-        "exp": datetime.now(timezone.utc) + REFRESH_TOKEN_EXPIRE,
+        "exp": int(expires_at.timestamp()),
         "type": "refresh"
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return encode_token(payload)
+
 
+def decode_token(token: str) -> dict:
+    """
+    Декодирует JWT. Результат кэшируется до истечения срока действия
+    токена, поэтому повторные запросы с тем же токеном не выполняют
+    проверку подписи заново. При невалидном токене вызывает JWTError.
+    """
+    now = datetime.now(timezone.utc).timestamp()
+    payload = _token_payload_cache.get(token)
+    if payload is not None:
+        if payload["exp"] > now:
+            return payload
+        del _token_payload_cache[token]
+
+    payload = jwt.decode(token, JWT_SECRET, algorithms=JWT_ALGORITHMS)
+    if "exp" in payload:
+        if len(_token_payload_cache) >= TOKEN_CACHE_MAXSIZE:
+            _token_payload_cache.pop(next(iter(_token_payload_cache)))
+        _token_payload_cache[token] = payload
+    return payload
 
-async def verify_token(token: str, db: AsyncSession) -> User:
+
+def get_cached_user_status(user_id: int) -> Optional[bool]:
+    """
+    Возвращает закэшированный статус активности пользователя или None,
+    если его нет в кэше или срок хранения истек.
+    """
+    cached = _user_status_cache.get(user_id)
+    if cached is None:
+        return None
+    is_active, valid_until = cached
+    if valid_until <= time.monotonic():
+        del _user_status_cache[user_id]
+        return None
+    return is_active
+
+
+def cache_user_status(user_id: int, is_active: bool):
+    if len(_user_status_cache) >= USER_STATUS_CACHE_MAXSIZE:
+        _user_status_cache.pop(next(iter(_user_status_cache)))
+    _user_status_cache[user_id] = (
+        is_active, time.monotonic() + USER_STATUS_CACHE_TTL
+    )
+
+
+async def verify_token(token: str, db: AsyncSession) -> tuple[User, bool]:
+    """
+    Проверяет токен и одним запросом загружает пользователя вместе
+    с признаком наличия токена в черном списке.
+    Возвращает пару (пользователь, токен в черном списке).
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
     )
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=JWT_ALGORITHM)
+        payload = decode_token(token)
         user_id: int = payload.get("user_id")
         if user_id is None:
             raise credentials_exception
@@ -64,23 +195,43 @@ async def verify_token(token: str, db: AsyncSession) -> User:
         print(f"JWTError: {str(e)}")
         raise credentials_exception
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
+    result = await db.execute(
+        select(
+            User,
+            exists().where(BlacklistedToken.token == hash_token(token))
+        )
+        .where(User.id == user_id)
+    )
+    row = result.one_or_none()
 
-    if user is None:
+    if row is None:
         raise credentials_exception
 
-    return user
+    user, is_blacklisted = row
+    if is_blacklisted:
+        add_to_blacklist(
+            token, datetime.fromtimestamp(payload["exp"], timezone.utc)
+        )
+
+    return user, is_blacklisted
 
 
-def get_token_payload(token):
+def get_token_payload(token, expected_type: Optional[str] = None):
+    """
+    Декодирует токен и, если передан expected_type, проверяет тип токена.
+    """
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = decode_token(token)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
         )
+    if expected_type is not None and payload.get("type") != expected_type:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token type",
+        )
     return payload
 
 
@@ -91,7 +242,7 @@ def get_token_expire(token):
 
 
 def get_current_user(request: Request):
-    user = request.state.user
+    user = request.scope.get("user")
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -116,16 +267,21 @@ async def auth_middleware(request: Request, call_next):
     if not token:
         return JSONResponse(status_code=status.HTTP_401_UNAUTHORIZED,
                             content={"detail": "Not authenticated"})
+    if is_token_blacklisted(token):
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"detail": "Token is blacklisted"},
+        )
+
     get_db_context = request.app.state.get_db_context
     async with get_db_context() as db:
-        result = await db.execute(
-            select(BlacklistedToken).where(BlacklistedToken.token == token))
-        if result.scalars().first():
+        user, is_blacklisted = await verify_token(token, db)
+
+        if is_blacklisted:
             return JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Token is blacklisted"},
             )
-        user = await verify_token(token, db)
 
         if not user.is_active:
             return JSONResponse(
@@ -141,6 +297,7 @@ async def auth_middleware(request: Request, call_next):
                         "detail": "Access denied. Admin rights required."},
                 )
 
-        request.state.user = user
+        request.scope["user"] = user
+        request.state.db = db
 
-    return await call_next(request)
+        return await call_next(request)
@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from db.models import BlacklistedToken
+
+BLACKLIST_REFRESH_INTERVAL = 30
+BLACKLIST_PURGE_INTERVAL = 3600
+
+logger = logging.getLogger("fastapi")
+
+# хэши токенов из таблицы blacklisted_token и время истечения
+# их срока действия
+_blacklisted_tokens: dict[bytes, datetime] = {}
+
+
+def hash_token(token: str) -> bytes:
+    """
+    Возвращает SHA-256 хэш токена, под которым он хранится в черном списке.
+    """
+    return hashlib.sha256(token.encode()).digest()
+
+
+def is_token_blacklisted(token: str) -> bool:
+    return hash_token(token) in _blacklisted_tokens
+
+
+def add_to_blacklist(token: str, expires_at: datetime):
+    _blacklisted_tokens[hash_token(token)] = expires_at
+
+
+async def load_blacklist(db: AsyncSession):
+    """
+    Загружает из базы данных токены, срок действия которых еще не истек,
+    и удаляет из черного списка токены с истекшим сроком действия.
+    """
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        select(BlacklistedToken.token, BlacklistedToken.expires_at)
+        .where(BlacklistedToken.expires_at > now)
+    )
+    _blacklisted_tokens.update(result.tuples().all())
+
+    expired = [token_hash
+               for token_hash, expires_at in _blacklisted_tokens.items()
+               if expires_at <= now]
+    for token_hash in expired:
+        del _blacklisted_tokens[token_hash]
+
+
+async def refresh_blacklist_periodically(
+        get_db_context,
+        interval: int = BLACKLIST_REFRESH_INTERVAL
+):
+    """
+    Фоновая задача: периодически синхронизирует черный список токенов
+    с базой данных.
+    """
+    while True:
+        try:
+            async with get_db_context() as db:
+                await load_blacklist(db)
+        except Exception as e:
+            logger.error(f"Failed to refresh token blacklist: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+async def purge_expired_tokens(db: AsyncSession):
+    """
+    Удаляет из таблицы blacklisted_token токены с истекшим сроком действия:
+    такие токены уже не проходят проверку подписи и срока действия.
+    """
+    await db.execute(
+        delete(BlacklistedToken)
+        .where(BlacklistedToken.expires_at < func.now())
+    )
+    await db.commit()
+
+
+async def purge_expired_tokens_periodically(
+        get_db_context,
+        interval: int = BLACKLIST_PURGE_INTERVAL
+):
+    """
+    Фоновая задача: периодически очищает черный список токенов
+    от записей с истекшим сроком действия.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with get_db_context() as db:
+                await purge_expired_tokens(db)
+        except Exception as e:
+            logger.error(f"Failed to purge expired tokens: {str(e)}")
@@ -1,39 +1,59 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Cookie, Response
 from fastapi import Request
 from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.templating import Jinja2Templates
+from sqlalchemy import bindparam, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import raiseload
 
 from auth.auth import (
-    check_password,
+    check_password, hash_password, password_needs_rehash,
     get_token_payload, get_token_expire,
     create_access_token, create_refresh_token,
+    get_cached_user_status, cache_user_status,
 )
-from db.db import get_db
+from auth.blacklist import add_to_blacklist, hash_token, is_token_blacklisted
+from db.db import get_db, get_db_ro
 from db.models import BlacklistedToken, User
 
 templates = Jinja2Templates(directory="auth/templates")
 router = APIRouter()
 
+# шаблоны страниц входа и выхода статичны, поэтому рендерятся один раз
+LOGIN_PAGE_HTML = templates.get_template("login.html").render()
+LOGOUT_PAGE_HTML = templates.get_template("logout.html").render()
+
+USER_BY_USERNAME_QUERY = (
+    select(User.id, User.password_hash, User.is_active)
+    .where(User.username == bindparam("username"))
+)
+
 
 @router.get("/login", response_class=HTMLResponse)
-async def login_page(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
+async def login_page():
+    return HTMLResponse(LOGIN_PAGE_HTML)
 
 
 @router.post("/login")
 async def login(
-    form_data: OAuth2PasswordRequestForm = Depends(),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_db_ro)
 ):
-    result = await db.execute(
-        select(User).where(User.username == form_data.username)
-    )
-    user = result.scalars().first()
+    form = await request.form()
+    username = form.get("username")
+    password = form.get("password")
+    if not username or not password:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username and password are required",
+        )
 
-    if not user or not check_password(form_data.password, user.password_hash):
+    result = await db.execute(USER_BY_USERNAME_QUERY, {"username": username})
+    user = result.one_or_none()
+
+    if not user or not await check_password(password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -45,6 +65,14 @@ async def login(
             detail="Account is not active. Please wait for admin approval.",
         )
 
+    if password_needs_rehash(user.password_hash):
+        await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(password_hash=await hash_password(password))
+        )
+        await db.commit()
+
     access_token = create_access_token({"user_id": user.id,
                                         "is_active": user.is_active})
     refresh_token = create_refresh_token({"user_id": user.id})
@@ -60,8 +88,8 @@ async def login(
 
 
 @router.get("/logout", response_class=HTMLResponse)
-async def logout_page(request: Request):
-    return templates.TemplateResponse("logout.html", {"request": request})
+async def logout_page():
+    return HTMLResponse(LOGOUT_PAGE_HTML)
 
 
 @router.post("/logout")
@@ -81,14 +109,21 @@ async def logout(
     expires_at_access = get_token_expire(access_token)
     expires_at_refresh = get_token_expire(refresh_token)
 
-    blacklisted_access_token = BlacklistedToken(token=access_token,
-                                                expires_at=expires_at_access)
-    db.add(blacklisted_access_token)
-    blacklisted_refresh_token = BlacklistedToken(token=refresh_token,
-                                                 expires_at=expires_at_refresh)
-    db.add(blacklisted_refresh_token)
+    await db.execute(
+        insert(BlacklistedToken)
+        .on_conflict_do_nothing(index_elements=[BlacklistedToken.token]),
+        [
+            {"token": hash_token(access_token),
+             "expires_at": expires_at_access},
+            {"token": hash_token(refresh_token),
+             "expires_at": expires_at_refresh},
+        ]
+    )
     await db.commit()
 
+    add_to_blacklist(access_token, expires_at_access)
+    add_to_blacklist(refresh_token, expires_at_refresh)
+
     response.delete_cookie(key="access_token")
     response.delete_cookie(key="refresh_token")
 
@@ -99,20 +134,19 @@ async def logout(
 async def get_new_access_token(
         response: Response,
         refresh_token: str = Cookie(None),
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_db_ro)
 ):
     if refresh_token is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Refresh token not found in cookies"
         )
-    payload = get_token_payload(refresh_token)
-
-    if payload.get("type") != "refresh":
+    if is_token_blacklisted(refresh_token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token type",
+            detail="Token is blacklisted",
         )
+    payload = get_token_payload(refresh_token, expected_type="refresh")
 
     user_id = payload.get("user_id")
     if user_id is None:
@@ -121,18 +155,21 @@ async def get_new_access_token(
             detail="Invalid token",
         )
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-        )
+    is_active = get_cached_user_status(user_id)
+    if is_active is None:
+        user = await db.get(User, user_id, options=[raiseload("*")])
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+            )
+        is_active = user.is_active
+        cache_user_status(user_id, is_active)
 
     access_token = create_access_token(
         {
-            "user_id": user.id,
-            "is_active": user.is_active
+            "user_id": user_id,
+            "is_active": is_active
         }
     )
     response.set_cookie(key="access_token", value=access_token,
@@ -1,7 +1,9 @@
+import asyncio
 import os
-from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
+from fastapi import Request
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncSession,
@@ -21,7 +23,33 @@ DATABASE_URL = "postgresql+asyncpg://{}:{}@{}:{}/{}".format(
     os.environ["DB_NAME"]
 )
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# число воркеров * (DB_POOL_SIZE + DB_MAX_OVERFLOW) не должно превышать
+# max_connections в PostgreSQL
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 40))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 512))
+# размер кэша скомпилированных SQLAlchemy запросов
+DB_QUERY_CACHE_SIZE = int(os.environ.get("DB_QUERY_CACHE_SIZE", 1200))
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    query_cache_size=DB_QUERY_CACHE_SIZE,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_timeout=DB_POOL_TIMEOUT,
+    connect_args={
+        "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "server_settings": {
+            "jit": "off",
+            "application_name": "event_creator",
+        },
+    },
+)
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -29,16 +57,44 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# сессии без явной транзакции (без BEGIN/COMMIT) для эндпоинтов,
+# которые только читают данные или выполняют одиночные запросы
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=engine.execution_options(isolation_level="AUTOCOMMIT"),
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
 
-async def get_db():
-    async with AsyncSessionLocal() as session:
-        yield session
+async def get_db(request: Request):
+    """
+    Возвращает сессию, открытую auth_middleware для текущего запроса,
+    или открывает новую сессию для публичных эндпоинтов.
+    """
+    db = getattr(request.state, "db", None)
+    if db is not None:
+        yield db
+    else:
+        async with AsyncSessionLocal() as session:
+            yield session
 
 
-@asynccontextmanager
-async def get_db_context():
-    async with AsyncSessionLocal() as session:
+async def get_db_ro():
+    async with AsyncReadSessionLocal() as session:
         yield session
 
 
+async def warm_up_pool(size: int = DB_POOL_SIZE):
+    """
+    Заранее открывает соединения пула, чтобы первые запросы
+    не тратили время на подключение к базе данных.
+    """
+    async def ping():
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(size)))
+
+
 Base = declarative_base()
@@ -1,4 +1,3 @@
-from datetime import datetime, timezone
 from enum import Enum
 
 from sqlalchemy import (
@@ -6,11 +5,15 @@ from sqlalchemy import (
     Integer,
     String,
     ForeignKey,
+    Index,
     DateTime,
     Boolean,
     Text,
+    LargeBinary,
+    UniqueConstraint,
+    func,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, configure_mappers
 from sqlalchemy.types import DECIMAL
 from sqlalchemy.types import Enum as SQLAEnum
 
@@ -21,8 +24,9 @@ class BlacklistedToken(Base):
     __tablename__ = "blacklisted_token"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    token = Column(String, unique=True, nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    # SHA-256 хэш токена
+    token = Column(LargeBinary(32), unique=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
 
 
 class UserRole(Enum):
@@ -36,42 +40,53 @@ class UserRole(Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __mapper_args__ = {"eager_defaults": True}
+    # списки заказчиков и подрядчиков сортируются по (updated_at, id)
+    # и (name, id) внутри роли
+    __table_args__ = (
+        Index("ix_users_role_updated", "role", "updated_at", "id"),
+        Index("ix_users_role_name", "role", "name", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    username = Column(String, nullable=False)
+    username = Column(String, nullable=False, unique=True, index=True)
     email = Column(String, nullable=False, unique=True)
     password_hash = Column(String, nullable=False)
     name = Column(String, nullable=False)
     contact_data = Column(String)
     role = Column(SQLAEnum(UserRole), default=UserRole.USER)
-    created_at = Column(DateTime(timezone=True),
-                        default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True),
-                        default=lambda: datetime.now(timezone.utc),
-                        onupdate=lambda: datetime.now(timezone.utc))
+                        server_default=func.now(),
+                        onupdate=func.now())
     is_active = Column(Boolean, default=False)
 
     contractor = relationship("Contractor",
                               back_populates="user",
                               foreign_keys="[Contractor.user_id]",
                               cascade="all, delete-orphan",
+                              passive_deletes=True,
                               uselist=False)
     reviews = relationship("Review",
                            back_populates="owner",
                            foreign_keys="[Review.user_id]",
-                           cascade="all, delete-orphan")
+                           cascade="all, delete-orphan",
+                           passive_deletes=True)
     created_events = relationship("Event",
                                   back_populates="user",
                                   foreign_keys="[Event.user_id]",
-                                  cascade="all, delete-orphan")
+                                  cascade="all, delete-orphan",
+                                  passive_deletes=True)
     organized_events = relationship("Event",
                                     back_populates="organizer",
                                     foreign_keys="[Event.organizer_id]",
-                                    cascade="all, delete-orphan")
+                                    cascade="all, delete-orphan",
+                                    passive_deletes=True)
     sent_invitations = relationship("EventInvitation",
                                     back_populates="sender",
                                     foreign_keys="[EventInvitation.sender_id]",
-                                    cascade="all, delete-orphan")
+                                    cascade="all, delete-orphan",
+                                    passive_deletes=True)
 
     def __repr__(self):
         return f"User(id={self.id}, username={self.username})"
@@ -79,17 +94,23 @@ class User(Base):
 
 class Contractor(Base):
     __tablename__ = "contractor"
+    __mapper_args__ = {"eager_defaults": True}
+    # список заявок подрядчиков сортируется по (created_at, id)
+    __table_args__ = (
+        Index("ix_contractor_approved_created",
+              "is_approved", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id"), unique=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"),
+                     unique=True)
     photo = Column(String, nullable=False)
     description = Column(String, nullable=False)
     is_approved = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True),
-                        default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True),
-                        default=lambda: datetime.now(timezone.utc),
-                        onupdate=lambda: datetime.now(timezone.utc))
+                        server_default=func.now(),
+                        onupdate=func.now())
     average_rating = Column(DECIMAL(3, 2), default=None)
 
     user = relationship("User",
@@ -99,33 +120,48 @@ class Contractor(Base):
     services = relationship("ContractorService",
                             back_populates="contractor",
                             foreign_keys="[ContractorService.contractor_id]",
-                            cascade="all, delete-orphan")
+                            cascade="all, delete-orphan",
+                            passive_deletes=True)
     portfolio_items = relationship(
         "PortfolioItem",
         back_populates="contractor",
         foreign_keys="[PortfolioItem.contractor_id]",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     reviews = relationship("Review",
                            back_populates="contractor",
                            foreign_keys="[Review.contractor_id]",
-                           cascade="all, delete-orphan")
+                           cascade="all, delete-orphan",
+                           passive_deletes=True)
     invitations = relationship("EventInvitation",
                                back_populates="contractor",
                                foreign_keys="[EventInvitation.recipient_id]",
-                               cascade="all, delete-orphan")
+                               cascade="all, delete-orphan",
+                               passive_deletes=True)
 
     def __repr__(self):
         return (f"Contractor(id={self.id}, user_id={self.user_id}, "
                 f"is_approved={self.is_approved})")
 
 
+# список подрядчиков услуги сортируется по рейтингу, подрядчики
+# без рейтинга идут как имеющие рейтинг 0
+Index("ix_contractor_rating",
+      func.coalesce(Contractor.average_rating, 0), Contractor.id)
+
+
 class ContractorService(Base):
     __tablename__ = "contractor_service"
+    __table_args__ = (
+        Index("ix_contractor_service_service",
+              "service_id", "contractor_id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    service_id = Column(Integer, ForeignKey("service.id"))
-    contractor_id = Column(Integer, ForeignKey("contractor.id"))
+    service_id = Column(Integer, ForeignKey("service.id", ondelete="CASCADE"))
+    contractor_id = Column(Integer,
+                           ForeignKey("contractor.id", ondelete="CASCADE"))
     description = Column(Text, nullable=False)
     # значение цены может быть указано "по запросу"
     price = Column(String, nullable=False)
@@ -145,17 +181,22 @@ class ContractorService(Base):
 
 class PortfolioItem(Base):
     __tablename__ = "portfolio_item"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index("ix_portfolio_item_contractor_updated",
+              "contractor_id", "updated_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    contractor_id = Column(Integer, ForeignKey("contractor.id"))
+    contractor_id = Column(Integer,
+                           ForeignKey("contractor.id", ondelete="CASCADE"))
     type = Column(String)
     url = Column(String)
     description = Column(String, nullable=False)
-    created_at = Column(DateTime(timezone=True),
-                        default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True),
-                        default=lambda: datetime.now(timezone.utc),
-                        onupdate=lambda: datetime.now(timezone.utc))
+                        server_default=func.now(),
+                        onupdate=func.now())
 
     contractor = relationship("Contractor",
                               back_populates="portfolio_items",
@@ -169,14 +210,19 @@ class PortfolioItem(Base):
 
 class Review(Base):
     __tablename__ = "review"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index("ix_review_contractor_created",
+              "contractor_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    contractor_id = Column(Integer, ForeignKey("contractor.id"))
-    user_id = Column(Integer, ForeignKey("users.id"))
+    contractor_id = Column(Integer,
+                           ForeignKey("contractor.id", ondelete="CASCADE"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     rating = Column(DECIMAL(3, 2))
     comment = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True),
-                        default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     contractor = relationship("Contractor",
                               back_populates="reviews",
@@ -201,7 +247,8 @@ class Category(Base):
     services = relationship("Service",
                             back_populates="category",
                             foreign_keys="[Service.category_id]",
-                            cascade="all, delete-orphan")
+                            cascade="all, delete-orphan",
+                            passive_deletes=True)
 
     def __repr__(self):
         return f"Category(id={self.id}, name={self.name})"
@@ -212,7 +259,8 @@ class Service(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, unique=True)
-    category_id = Column(Integer, ForeignKey("category.id"))
+    category_id = Column(Integer,
+                         ForeignKey("category.id", ondelete="CASCADE"))
 
     category = relationship("Category",
                             back_populates="services",
@@ -221,7 +269,8 @@ class Service(Base):
         "ContractorService",
         back_populates="service",
         foreign_keys="[ContractorService.service_id]",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
 
     def __repr__(self):
@@ -231,20 +280,29 @@ class Service(Base):
 
 class Event(Base):
     __tablename__ = "event"
+    __mapper_args__ = {"eager_defaults": True}
+    # списки мероприятий сортируются по (created_at, id): у админа
+    # без фильтра, у создателя и организатора по своему столбцу
+    __table_args__ = (
+        Index("ix_event_created", "created_at", "id"),
+        Index("ix_event_user_created", "user_id", "created_at", "id"),
+        Index("ix_event_org_created", "organizer_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    organizer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"),
+                     nullable=False)
+    organizer_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"),
+                          nullable=False)
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     location = Column(String, nullable=False)
     start_time = Column(DateTime(timezone=True), nullable=False)
     end_time = Column(DateTime(timezone=True), nullable=False)
-    created_at = Column(DateTime(timezone=True),
-                        default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True),
-                        default=lambda: datetime.now(timezone.utc),
-                        onupdate=lambda: datetime.now(timezone.utc))
+                        server_default=func.now(),
+                        onupdate=func.now())
 
     user = relationship("User",
                         back_populates="created_events",
@@ -255,7 +313,8 @@ class Event(Base):
     invitations = relationship("EventInvitation",
                                back_populates="event",
                                foreign_keys="[EventInvitation.event_id]",
-                               cascade="all, delete-orphan")
+                               cascade="all, delete-orphan",
+                               passive_deletes=True)
 
     def __repr__(self):
         return f"Event(id={self.id}, name={self.name}, user_id={self.user_id})"
@@ -274,19 +333,26 @@ class EventInvitationStatus(Enum):
 
 class EventInvitation(Base):
     __tablename__ = "event_invitation"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        UniqueConstraint("event_id", "recipient_id",
+                         name="uq_event_recipient"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    event_id = Column(Integer, ForeignKey("event.id"), nullable=False)
-    recipient_id = Column(Integer, ForeignKey("contractor.id"),
+    event_id = Column(Integer, ForeignKey("event.id", ondelete="CASCADE"),
+                      nullable=False)
+    recipient_id = Column(Integer,
+                          ForeignKey("contractor.id", ondelete="CASCADE"),
                           nullable=False)
-    sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"),
+                       nullable=False)
     status = Column(SQLAEnum(EventInvitationStatus),
                     default=EventInvitationStatus.PENDING)
-    created_at = Column(DateTime(timezone=True),
-                        default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True),
-                        default=lambda: datetime.now(timezone.utc),
-                        onupdate=lambda: datetime.now(timezone.utc))
+                        server_default=func.now(),
+                        onupdate=func.now())
 
     event = relationship("Event",
                          back_populates="invitations",
@@ -302,3 +368,8 @@ class EventInvitation(Base):
             f"sender_id={self.sender_id}, recipient_id={self.recipient_id},"
             f"status={self.status})"
         )
+
+
+# связи между моделями настраиваются один раз при импорте,
+# а не при первом запросе
+configure_mappers()
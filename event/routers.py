@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import (
     APIRouter,
@@ -6,12 +6,11 @@ from fastapi import (
     HTTPException,
     status,
     Query,
-    BackgroundTasks,
 )
-from sqlalchemy import desc, asc
+from sqlalchemy import Select, exists, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 
 from db.db import get_db
 from db.models import (
@@ -30,7 +29,7 @@ from event.schemas import (
     EventInvitationCreateSchema,
 )
 from event.utils import get_invitation_or_404
-from mail.mail import send_email
+from mail.mail import queue_email, queue_bulk_email
 from permissions import (
     admin_or_creator_or_organizer_permission,
     admin_or_self_user_permission,
@@ -38,7 +37,15 @@ from permissions import (
     admin_or_self_contractor_permission,
     admin_or_creator_or_organizer_or_invited_permission,
 )
-from user.utils import get_contractor_or_404, get_user_or_404
+from user.utils import ensure_contractor_exists, get_user_or_404
+from utils.pagination import (
+    MAX_PAGE_SIZE,
+    SORT_ORDERS,
+    SortOrder,
+    paginate,
+    set_next_cursor,
+)
+from utils.responses import schema_list_response, schema_response
 
 router = APIRouter()
 
@@ -46,15 +53,26 @@ router = APIRouter()
 @router.get("/events", response_model=List[EventOutSchema])
 async def get_events(
         skip: int = Query(0, ge=0),
-        imit: int = Query(10, gt=0),
-        sort_order: str = Query("asc", pattern="^(asc|desc)$"),
-        events: List[Event] = Depends(admin_or_creator_or_organizer_permission)
+        limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE),
+        sort_order: SortOrder = Query("asc"),
+        after: Optional[str] = Query(None),
+        query: Select = Depends(admin_or_creator_or_organizer_permission),
+        db: AsyncSession = Depends(get_db)
 ):
     """
     Получение списка мероприятий. Админ получает список всех мероприятий,
     пользователь - список созданных им и где он выступает организатором.
     """
-    return events
+    query = paginate(query, (Event.created_at, Event.id),
+                     sort_order, skip, limit, after)
+
+    result = await db.execute(query)
+    events = result.scalars().all()
+
+    response = schema_list_response(EventOutSchema, events)
+    set_next_cursor(response, events, limit,
+                    lambda event: (event.created_at, event.id))
+    return response
 
 
 @router.get("/events/{event_id}", response_model=EventOutSchema)
@@ -68,7 +86,7 @@ async def event_detail(
     организатора мероприятия, а также подрядчиков, получивших приглашение
     к участию в мероприятии.
     """
-    return event
+    return schema_response(EventOutSchema, event)
 
 
 @router.post("/users/{user_id}/events", response_model=EventOutSchema)
@@ -94,8 +112,7 @@ async def create_event(
     )
     db.add(new_event)
     await db.commit()
-    await db.refresh(new_event)
-    return new_event
+    return schema_response(EventOutSchema, new_event)
 
 
 @router.patch(
@@ -116,13 +133,12 @@ async def update_event(
     update_event_data = event_data.model_dump(exclude_unset=True)
 
     if not update_event_data:
-        return event
+        return schema_response(EventOutSchema, event)
 
     for key, value in update_event_data.items():
         setattr(event, key, value)
     await db.commit()
-    await db.refresh(event)
-    return event
+    return schema_response(EventOutSchema, event)
 
 
 @router.patch(
@@ -144,40 +160,45 @@ async def update_event_organizer(
     или админа.
     """
 
-    organizer = await get_user_or_404(organizer_data.organizer_id, db)
-    contractor_check = await db.execute(
-        select(Contractor)
-        .where(Contractor.user_id == organizer.id)
-    )
-    contractor = contractor_check.scalars().first()
-
-    if not contractor:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="The specified user is not a contractor"
-        )
-
+    organizer_id = organizer_data.organizer_id
+    # организатор меняется одним запросом, если пользователь - подрядчик
+    # с подтвержденным приглашением на мероприятие
     result = await db.execute(
-        select(EventInvitation)
+        update(Event)
+        .where(Event.id == event.id)
         .where(
-            (EventInvitation.event_id == event_id) &
-            (EventInvitation.recipient_id == contractor.id) &
-            (EventInvitation.status == EventInvitationStatus.CONFIRMED)
+            exists()
+            .where(EventInvitation.event_id == Event.id)
+            .where(EventInvitation.recipient_id == Contractor.id)
+            .where(EventInvitation.status == EventInvitationStatus.CONFIRMED)
+            .where(Contractor.user_id == organizer_id)
         )
+        .values(organizer_id=organizer_id)
+        .returning(Event)
+        .execution_options(populate_existing=True)
     )
-    invitation = result.scalars().first()
-
-    if not invitation:
+    updated_event = result.scalar_one_or_none()
+
+    if updated_event is None:
+        # обновление не выполнено: выясняем причину для ответа
+        organizer = await get_user_or_404(organizer_id, db)
+        contractor_id = await db.scalar(
+            select(Contractor.id)
+            .where(Contractor.user_id == organizer.id)
+        )
+        if contractor_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The specified user is not a contractor"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Contractor must have a confirmed invitation to the event"
         )
 
-    event.organizer_id = contractor.user_id
     await db.commit()
-    await db.refresh(event)
 
-    return event
+    return schema_response(EventOutSchema, updated_event)
 
 
 @router.delete("/users/{user_id}/events/{event_id}",
@@ -185,7 +206,6 @@ async def update_event_organizer(
 async def delete_event(
         event_id: int,
         user_id: int,
-        background_tasks: BackgroundTasks,
         event: Event = Depends(admin_or_creator_permission),
         db: AsyncSession = Depends(get_db)
 ):
@@ -193,26 +213,26 @@ async def delete_event(
     Удаление мероприятия на странице пользователя.
     Доступно только для админа и  создателя мероприятия.
     """
+    # адреса получателей выбираются одним запросом, а в очередь писем
+    # передаются только строки, а не объекты сессии
     result = await db.execute(
-        select(EventInvitation)
-        .options(selectinload(EventInvitation.contractor).selectinload(
-            Contractor.user))
+        select(User.email)
+        .join(Contractor, Contractor.user_id == User.id)
+        .join(EventInvitation, EventInvitation.recipient_id == Contractor.id)
         .where(EventInvitation.event_id == event_id)
     )
-    invitations = result.scalars().all()
+    recipient_emails = result.scalars().all()
+    context = {"event_name": event.name, "user_name": event.user.name}
 
     await db.delete(event)
     await db.commit()
 
-    for invitation in invitations:
-        background_tasks.add_task(
-            send_email,
-            to=invitation.contractor.user.email,
-            subject="Мероприятие отменено",
-            template_name="event_deleted.html",
-            context={"event_name": event.name,
-                     "user_name": event.user.name}
-        )
+    queue_bulk_email(
+        recipients=recipient_emails,
+        subject="Мероприятие отменено",
+        template_name="event_deleted.html",
+        context=context
+    )
 
     return {"message": "Event deleted successfully"}
 
@@ -221,7 +241,6 @@ async def delete_event(
              response_model=EventInvitationOutSchema)
 async def invite_contractor(
         event_id: int,
-        background_tasks: BackgroundTasks,
         data: EventInvitationCreateSchema,
         user_id: int,
         event: Event = Depends(admin_or_creator_or_organizer_permission),
@@ -231,43 +250,39 @@ async def invite_contractor(
     Отправка подрядчику приглашения к участию в мероприятии.
     Доступно админам, создателю мероприятия и организатору.
     """
-    contractor = await get_contractor_or_404(data.recipient_id, db)
-
-    result = await db.execute(
-        select(EventInvitation)
-        .where(
-            (EventInvitation.event_id == event.id) &
-            (EventInvitation.recipient_id == contractor.id)
+    await ensure_contractor_exists(data.recipient_id, db)
+
+    # повторное приглашение отсекается уникальным ограничением
+    # uq_event_recipient: запрос не возвращает id, если оно уже есть
+    new_invitation_id = await db.scalar(
+        insert(EventInvitation)
+        .values(
+            event_id=event.id,
+            sender_id=user_id,
+            recipient_id=data.recipient_id,
+            status=EventInvitationStatus.PENDING
         )
+        .on_conflict_do_nothing(constraint="uq_event_recipient")
+        .returning(EventInvitation.id)
     )
-    existing_invitation = result.scalars().first()
-    if existing_invitation:
+    if new_invitation_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Contractor already invited to this event"
         )
-
-    new_invitation = EventInvitation(
-        event_id=event.id,
-        sender_id=user_id,
-        recipient_id=contractor.id,
-        status=EventInvitationStatus.PENDING
-    )
-    db.add(new_invitation)
     await db.commit()
 
-    invitation = await get_invitation_or_404(new_invitation.id, db)
+    invitation = await get_invitation_or_404(new_invitation_id, db)
 
-    background_tasks.add_task(
-        send_email,
-        to=contractor.user.email,
+    queue_email(
+        to=invitation.contractor.user.email,
         subject="Новое приглашение на мероприятие",
         template_name="invitation_sent.html",
         context={"event_name": event.name,
                  "user_name": invitation.sender.name,
                  "invitation_id": invitation.id}
     )
-    return invitation
+    return schema_response(EventInvitationOutSchema, invitation)
 
 
 @router.get("/users/{user_id}/events/{event_id}/invitations",
@@ -276,8 +291,8 @@ async def get_sent_event_invitations(
         event_id: int,
         user_id: int,
         skip: int = Query(0, ge=0),
-        limit: int = Query(10, gt=0),
-        sort_order: str = Query("asc", pattern="^(asc|desc)$"),
+        limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE),
+        sort_order: SortOrder = Query("asc"),
         event: Event = Depends(admin_or_creator_or_organizer_permission),
         db: AsyncSession = Depends(get_db)
 ):
@@ -289,17 +304,14 @@ async def get_sent_event_invitations(
         select(EventInvitation)
         .where(EventInvitation.event_id == event.id)
     )
-    if sort_order == "desc":
-        query = query.order_by(desc(EventInvitation.created_at))
-    else:
-        query = query.order_by(asc(EventInvitation.created_at))
+    query = query.order_by(SORT_ORDERS[sort_order](EventInvitation.created_at))
 
     query = query.offset(skip).limit(limit)
 
     results = await db.execute(query)
     invitations = results.scalars().all()
 
-    return invitations
+    return schema_list_response(EventInvitationOutSchema, invitations)
 
 
 @router.get("/contractors/{contractor_id}/invitations",
@@ -309,8 +321,8 @@ async def get_received_invitations(
         contractor: Contractor = Depends(admin_or_self_contractor_permission),
         db: AsyncSession = Depends(get_db),
         skip: int = Query(0, ge=0),
-        limit: int = Query(10, gt=0),
-        sort_order: str = Query("asc", pattern="^(asc|desc)$")
+        limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE),
+        sort_order: SortOrder = Query("asc")
 ):
     """
     Получение списка поступивших подрядчику приглашений к участию
@@ -321,17 +333,14 @@ async def get_received_invitations(
         .where(EventInvitation.recipient_id == contractor.id)
     )
 
-    if sort_order == "desc":
-        query = query.order_by(desc(EventInvitation.created_at))
-    else:
-        query = query.order_by(asc(EventInvitation.created_at))
+    query = query.order_by(SORT_ORDERS[sort_order](EventInvitation.created_at))
 
     query = query.offset(skip).limit(limit)
 
     result = await db.execute(query)
     invitations = result.scalars().all()
 
-    return invitations
+    return schema_list_response(EventInvitationOutSchema, invitations)
 
 
 @router.patch(
@@ -340,7 +349,6 @@ async def get_received_invitations(
 async def accept_or_decline_invitation(
         contractor_id: int,
         invitation_id: int,
-        background_tasks: BackgroundTasks,
         contractor: Contractor = Depends(admin_or_self_contractor_permission),
         action: str = Query(..., description="Action to perform: "
                                              "'accept' or 'decline'"),
@@ -367,18 +375,16 @@ async def accept_or_decline_invitation(
 
     await db.commit()
 
-    db_invitation = await get_invitation_or_404(invitation.id, db)
-
-    background_tasks.add_task(
-        send_email,
-        to=db_invitation.sender.email,
+    # связи приглашения уже загружены get_invitation_or_404
+    queue_email(
+        to=invitation.sender.email,
         subject="Статус приглашения изменен",
         template_name="invitation_status_updated.html",
         context={"contractor_name": contractor.user.name,
                  "status": invitation.status}
     )
 
-    return invitation
+    return schema_response(EventInvitationOutSchema, invitation)
 
 
 @router.patch(
@@ -388,7 +394,6 @@ async def confirm_or_cancel_invitation(
         user_id: int,
         event_id: int,
         invitation_id: int,
-        background_tasks: BackgroundTasks,
         action: str = Query(..., description="Action to perform: "
                                              "'confirm' or 'cancel'"),
         event: Event = Depends(admin_or_creator_or_organizer_permission),
@@ -404,7 +409,9 @@ async def confirm_or_cancel_invitation(
                                              sender_id=user_id,
                                              event_id=event.id,
                                              db=db)
-    recipient = await get_contractor_or_404(invitation.recipient_id, db)
+    recipient_email = invitation.contractor.user.email
+    recipient_name = invitation.contractor.user.name
+    event_name = invitation.event.name
 
     if (
             action == "confirm"
@@ -420,30 +427,26 @@ async def confirm_or_cancel_invitation(
         invitation.status = EventInvitationStatus.CONFIRMED
         await db.commit()
 
-        invitation = await get_invitation_or_404(invitation_id=invitation.id,
-                                                 db=db)
-        background_tasks.add_task(
-            send_email,
-            to=recipient.user.email,
+        queue_email(
+            to=recipient_email,
             subject="Участие подтверждено",
             template_name="invitation_confirmed.html",
-            context={"user_name": recipient.user.name,
-                     "event_name": invitation.event.name}
+            context={"user_name": recipient_name,
+                     "event_name": event_name}
         )
-        return invitation
+        return schema_response(EventInvitationOutSchema, invitation)
 
     elif action == "cancel":
-        background_tasks.add_task(
-            send_email,
-            to=recipient.user.email,
+        await db.delete(invitation)
+        await db.commit()
+
+        queue_email(
+            to=recipient_email,
             subject="Приглашение отменено",
             template_name="invitation_canceled.html",
-            context={"user_name": recipient.user.name,
-                     "event_name": invitation.event.name}
+            context={"user_name": recipient_name,
+                     "event_name": event_name}
         )
-
-        await db.delete(invitation)
-        await db.commit()
         return {"message": "Invitation canceled successfully"}
 
     else:
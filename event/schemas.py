@@ -30,9 +30,9 @@ class EventOutSchema(BaseModel):
     id: PositiveInt
     user_id: PositiveInt
     organizer_id: PositiveInt
-    name: str = Field(..., min_length=3)
-    description: str = Field(..., min_length=5)
-    location: str = Field(..., min_length=5)
+    name: str
+    description: str
+    location: str
     start_time: datetime
     end_time: datetime
     created_at: datetime
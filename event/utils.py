@@ -5,7 +5,18 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
 
-from db.models import EventInvitation
+from db.models import EventInvitation, Contractor
+
+# запрос с опциями загрузки связей строится один раз при импорте
+INVITATION_QUERY = (
+    select(EventInvitation)
+    .options(
+        joinedload(EventInvitation.sender),
+        joinedload(EventInvitation.contractor)
+        .joinedload(Contractor.user),
+        joinedload(EventInvitation.event)
+    )
+)
 
 
 async def get_invitation_or_404(
@@ -20,15 +31,7 @@ async def get_invitation_or_404(
     отправителя или получателя.
     Если приглашение не найдено, вызывает ошибку 404.
     """
-    query = (
-        select(EventInvitation)
-        .where(EventInvitation.id == invitation_id)
-        .options(
-            joinedload(EventInvitation.sender),
-            joinedload(EventInvitation.contractor),
-            joinedload(EventInvitation.event)
-        )
-    )
+    query = INVITATION_QUERY.where(EventInvitation.id == invitation_id)
 
     if sender_id is not None:
         query = query.where(EventInvitation.sender_id == sender_id)
@@ -37,8 +40,7 @@ async def get_invitation_or_404(
     if event_id is not None:
         query = query.where(EventInvitation.event_id == event_id)
 
-    result = await db.execute(query)
-    invitation = result.scalars().first()
+    invitation = (await db.execute(query)).scalar_one_or_none()
 
     if not invitation:
         raise HTTPException(
@@ -1,37 +1,198 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+import asyncio
+import logging
+from email.message import EmailMessage
 
-from jinja2 import Template
-from dotenv import load_dotenv
-import os
+import aiosmtplib
+from fastapi_mail import ConnectionConfig
+from jinja2 import Environment, FileSystemLoader
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+MAIL_QUEUE_DRAIN_TIMEOUT = 10
+
+logger = logging.getLogger("fastapi")
+
+
+class MailSettings(BaseSettings):
+    """
+    Параметры почтового сервера из переменных окружения или файла .env.
+    """
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    MAIL_USERNAME: str
+    MAIL_PASSWORD: str
+    MAIL_FROM: str
+    MAIL_PORT: int
+    MAIL_SERVER: str
 
-load_dotenv()
 
 conf = ConnectionConfig(
-    MAIL_USERNAME=os.environ["MAIL_USERNAME"],
-    MAIL_PASSWORD=os.environ["MAIL_PASSWORD"],
-    MAIL_FROM=os.environ["MAIL_FROM"],
-    MAIL_PORT=int(os.environ["MAIL_PORT"]),
-    MAIL_SERVER=os.environ["MAIL_SERVER"],
+    **MailSettings().model_dump(),
     MAIL_STARTTLS=True,
     MAIL_SSL_TLS=False,
     MAIL_DEBUG=0,
     TEMPLATE_FOLDER="mail/templates",
 )
 
-fm = FastMail(conf)
+
+class SMTPConnection:
+    """
+    Долгоживущее SMTP-соединение, общее для всех отправок писем:
+    подключение, TLS и авторизация выполняются один раз, а не на
+    каждое письмо. Отправки сериализуются блокировкой; при разрыве
+    соединения сервером оно открывается заново.
+    """
+
+    def __init__(self, config: ConnectionConfig):
+        self._config = config
+        self._smtp = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        smtp = aiosmtplib.SMTP(
+            hostname=self._config.MAIL_SERVER,
+            port=self._config.MAIL_PORT,
+            use_tls=self._config.MAIL_SSL_TLS,
+            start_tls=self._config.MAIL_STARTTLS,
+            timeout=self._config.TIMEOUT,
+        )
+        await smtp.connect()
+        if self._config.USE_CREDENTIALS:
+            await smtp.login(
+                self._config.MAIL_USERNAME,
+                self._config.MAIL_PASSWORD.get_secret_value()
+            )
+        self._smtp = smtp
+
+    async def send(self, message: EmailMessage, recipients: list[str]):
+        if self._config.SUPPRESS_SEND:
+            return
+        async with self._lock:
+            if self._smtp is None or not self._smtp.is_connected:
+                await self._connect()
+            try:
+                await self._smtp.send_message(message, recipients=recipients)
+            except aiosmtplib.SMTPServerDisconnected:
+                await self._connect()
+                await self._smtp.send_message(message, recipients=recipients)
+
+    async def close(self):
+        async with self._lock:
+            if self._smtp is not None and self._smtp.is_connected:
+                try:
+                    await self._smtp.quit()
+                except aiosmtplib.SMTPException:
+                    self._smtp.close()
+            self._smtp = None
+
+
+smtp_connection = SMTPConnection(conf)
+
+# шаблоны писем компилируются один раз и хранятся в кэше окружения
+# все время работы процесса
+templates = Environment(
+    loader=FileSystemLoader(conf.TEMPLATE_FOLDER),
+    auto_reload=False,
+    cache_size=-1,
+    enable_async=True,
+)
+
+
+def warm_up_templates():
+    """
+    Заранее загружает и компилирует все шаблоны писем.
+    """
+    for template_name in templates.list_templates():
+        templates.get_template(template_name)
+
+
+async def _render_template(template_name: str, context: dict) -> str:
+    template = templates.get_template(template_name)
+    return await template.render_async(**context)
+
+
+def _build_message(to: str, subject: str, html_content: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = conf.MAIL_FROM
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(html_content, subtype="html")
+    return message
 
 
 async def send_email(to: str, subject: str, template_name: str, context: dict):
-    template_path = f"{conf.TEMPLATE_FOLDER}/{template_name}"
-    with open(template_path, "r", encoding="utf-8") as file:
-        template = Template(file.read())
-    html_content = template.render(**context)
-
-    message = MessageSchema(
-        subject=subject,
-        recipients=[to],
-        body=html_content,
-        subtype="html"
-    )
-
-    await fm.send_message(message)
+    html_content = await _render_template(template_name, context)
+    message = _build_message(to, subject, html_content)
+    await smtp_connection.send(message, recipients=[to])
+
+
+async def send_bulk_email(recipients: list[str], subject: str,
+                          template_name: str, context: dict):
+    """
+    Отправляет одно и то же письмо нескольким получателям: шаблон
+    рендерится один раз, письмо уходит одним сообщением. Получатели
+    передаются только в конверте SMTP, чтобы не раскрывать их адреса
+    друг другу.
+    """
+    if not recipients:
+        return
+
+    html_content = await _render_template(template_name, context)
+    message = _build_message(conf.MAIL_FROM, subject, html_content)
+    await smtp_connection.send(message, recipients=recipients)
+
+
+# письма, ожидающие отправки фоновым обработчиком mail_worker
+mail_queue: asyncio.Queue = asyncio.Queue()
+
+
+def queue_email(to: str, subject: str, template_name: str, context: dict):
+    """
+    Ставит письмо в очередь на отправку, не дожидаясь SMTP-сервера.
+    """
+    mail_queue.put_nowait((send_email, {
+        "to": to,
+        "subject": subject,
+        "template_name": template_name,
+        "context": context,
+    }))
+
+
+def queue_bulk_email(recipients: list[str], subject: str,
+                     template_name: str, context: dict):
+    """
+    Ставит в очередь на отправку письмо нескольким получателям.
+    """
+    mail_queue.put_nowait((send_bulk_email, {
+        "recipients": recipients,
+        "subject": subject,
+        "template_name": template_name,
+        "context": context,
+    }))
+
+
+async def mail_worker():
+    """
+    Фоновая задача: отправляет письма из очереди по одному через общее
+    SMTP-соединение.
+    """
+    while True:
+        send, kwargs = await mail_queue.get()
+        try:
+            await send(**kwargs)
+        except Exception as e:
+            logger.error(f"Failed to send email: {str(e)}")
+        finally:
+            mail_queue.task_done()
+
+
+async def drain_mail_queue(timeout: float = MAIL_QUEUE_DRAIN_TIMEOUT):
+    """
+    Дожидается отправки писем, оставшихся в очереди при остановке
+    приложения.
+    """
+    try:
+        await asyncio.wait_for(mail_queue.join(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"{mail_queue.qsize()} emails left unsent on shutdown"
+        )
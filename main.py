@@ -1,24 +1,62 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError, HTTPException
 
 from auth.auth import auth_middleware
+from auth.blacklist import (
+    refresh_blacklist_periodically,
+    purge_expired_tokens_periodically,
+)
 from auth.routers import router as auth_router
 from admin.views import setup_admin
-from db.db import get_db_context
+from db.db import AsyncSessionLocal, warm_up_pool
 from service.routers import router as service_router
 from user.routers import router as users_router
 from event.routers import router as event_router
+from mail.mail import (
+    drain_mail_queue,
+    mail_worker,
+    smtp_connection,
+    warm_up_templates,
+)
 from utils.log_middlware import (
     LogRequestsMiddleware,
     http_exception_handler,
     validation_exception_handler,
     global_exception_handler,
 )
+from utils.responses import ORJSONResponse
 
 
-app = FastAPI(title="Event Creator")
-app.state.get_db_context = get_db_context
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up_pool()
+    warm_up_templates()
+    background_tasks = [
+        asyncio.create_task(
+            refresh_blacklist_periodically(app.state.get_db_context)
+        ),
+        asyncio.create_task(
+            purge_expired_tokens_periodically(app.state.get_db_context)
+        ),
+        asyncio.create_task(mail_worker()),
+    ]
+    yield
+    await drain_mail_queue()
+    for task in background_tasks:
+        task.cancel()
+    await smtp_connection.close()
+
+
+app = FastAPI(
+    title="Event Creator",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+app.state.get_db_context = AsyncSessionLocal
 
 app.middleware("http")(auth_middleware)
 app.add_middleware(LogRequestsMiddleware)
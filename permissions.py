@@ -1,14 +1,14 @@
 from typing import Optional
 
-from fastapi import Depends, HTTPException, status, Query
-from sqlalchemy import desc, asc
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import exists
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
 
 from auth.auth import get_current_user
 from db.db import get_db
-from db.models import User, UserRole, Event, Contractor
+from db.models import User, UserRole, Event, Contractor, EventInvitation
 from user.utils import (
     get_user_or_404,
     get_contractor_or_404,
@@ -82,38 +82,38 @@ async def admin_or_owner_permission(
                         detail="Not enough permissions")
 
 
+async def _get_event_or_404(event_id: int, db: AsyncSession, *options):
+    """
+    Получает мероприятие по ID или вызывает ошибку 404. Мероприятие
+    берется из identity map сессии запроса, если уже было загружено.
+    """
+    event = await db.get(Event, event_id, options=options)
+    if event is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+    return event
+
+
 async def admin_or_creator_or_organizer_permission(
         event_id: Optional[int] = None,
         current_user: User = Depends(get_current_user),
-        skip: int = Query(0, ge=0),
-        limit: int = Query(10, gt=0),
-        sort_order: str = Query("asc", pattern="^(asc|desc)$"),
         db: AsyncSession = Depends(get_db)
 ):
     """
     Проверка прав доступа к списку событий или конкретному событию:
     если event_id передан, проверяет права доступа к конкретному событию и
     возвращает его в случае разрешения;
-    если event_id не передан, возвращает список событий, к которым у
-    пользователя  есть доступ, с учетом сортировки и пагинации.
+    если event_id не передан, возвращает запрос списка событий, к которым
+    у пользователя есть доступ; сортировка и пагинация применяются
+    в эндпоинте.
     """
     if event_id is not None:
-        result = await db.execute(
-            select(Event)
-            .where(Event.id == event_id)
-            .options(
-                joinedload(Event.user),
-                joinedload(Event.organizer),
-                joinedload(Event.invitations)
-            )
-        )
-        event = result.scalars().first()
+        # текущий пользователь уже загружен auth_middleware, поэтому
+        # проверка прав требует только одного запроса мероприятия
+        event = await _get_event_or_404(event_id, db)
 
-        if event is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Event not found"
-            )
         if (
                 current_user.role == UserRole.ADMIN
                 or event.user_id == current_user.id
@@ -126,32 +126,11 @@ async def admin_or_creator_or_organizer_permission(
                 detail="Not enough permissions"
             )
     else:
-        if current_user.role == UserRole.ADMIN:
-            result = await db.execute(select(Event))
-            events = result.scalars().all()
-        else:
-
-            query = (
-                select(Event)
-                .where((Event.user_id == current_user.id) |
-                       (Event.organizer_id == current_user.id))
-                .options(
-                    joinedload(Event.user),
-                    joinedload(Event.organizer),
-                    joinedload(Event.invitations)
-                )
-            )
-            if sort_order == "desc":
-                query = query.order_by(desc(Event.created_at))
-            else:
-                query = query.order_by(asc(Event.created_at))
-
-            query = query.offset(skip).limit(limit)
-
-            result = await db.execute(query)
-            events = result.scalars().unique().all()
-
-        return events
+        query = select(Event)
+        if current_user.role != UserRole.ADMIN:
+            query = query.where((Event.user_id == current_user.id) |
+                                (Event.organizer_id == current_user.id))
+        return query
 
 
 async def admin_or_creator_permission(
@@ -163,27 +142,20 @@ async def admin_or_creator_permission(
     Проверка прав доступа к конкретному мероприятию только админа
     или создателя. Возвращает мероприятие.
     """
-    result = await db.execute(
-        select(Event)
-        .where(Event.id == event_id)
-        .options(
-            joinedload(Event.user),
-            joinedload(Event.organizer),
-            joinedload(Event.invitations)
-        )
+    # для удаления мероприятия нужно только имя создателя: приглашения
+    # удаляются каскадно внешним ключом
+    event = await _get_event_or_404(
+        event_id, db,
+        joinedload(Event.user).load_only(User.name)
     )
-    event = result.scalars().first()
 
-    if event is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Event not found"
-        )
     if (
             current_user.role == UserRole.ADMIN
             or event.user_id == current_user.id
     ):
         return event
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                        detail="Not enough permissions")
 
 
 async def admin_or_creator_or_organizer_or_invited_permission(
@@ -196,48 +168,56 @@ async def admin_or_creator_or_organizer_or_invited_permission(
     если пользователь админ, создатель или организатор мероприятия, или
     подрядчик, которому направлено приглашение к участию.
     """
-
-    result = await db.execute(
-        select(Event)
-        .where(Event.id == event_id)
-        .options(
-            joinedload(Event.user),
-            joinedload(Event.organizer),
-            joinedload(Event.invitations)
-        )
-    )
-    event = result.scalars().first()
-
-    if event is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Event not found"
+    if current_user.role != UserRole.CONTRACTOR:
+        event = await _get_event_or_404(event_id, db)
+        if (
+                current_user.role == UserRole.ADMIN
+                or event.user_id == current_user.id
+                or event.organizer_id == current_user.id
+        ):
+            return event
+    else:
+        # для подрядчика мероприятие, его запись подрядчика и наличие
+        # приглашения загружаются одним запросом
+        result = await db.execute(
+            select(
+                Event,
+                select(Contractor.id)
+                .where(Contractor.user_id == current_user.id)
+                .scalar_subquery()
+                .label("contractor_id"),
+                exists()
+                .where(EventInvitation.event_id == Event.id)
+                .where(EventInvitation.recipient_id == Contractor.id)
+                .where(Contractor.user_id == current_user.id)
+                .label("is_invited")
+            )
+            .where(Event.id == event_id)
         )
+        row = result.one_or_none()
 
-    if (
-            current_user.role == UserRole.ADMIN
-            or event.user_id == current_user.id
-            or event.organizer_id == current_user.id
-    ):
-        return event
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Event not found"
+            )
 
-    if current_user.role == UserRole.CONTRACTOR:
-        contractor_result = await db.execute(
-            select(Contractor)
-            .where(user_id=current_user.id)
-        )
-        contractor = contractor_result.scalars().first()
+        event, contractor_id, is_invited = row
+        if (
+                event.user_id == current_user.id
+                or event.organizer_id == current_user.id
+        ):
+            return event
 
-        if contractor is None:
+        if contractor_id is None:
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail="There is a problem with your account. "
                        "Please contact administrator."
             )
 
-        for invitation in event.invitations:
-            if invitation.recipient_id == contractor.id:
-                return event
+        if is_invited:
+            return event
 
     raise HTTPException(
         status_code=status.HTTP_403_FORBIDDEN,
@@ -1,9 +1,17 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import List, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    Query,
+    Response,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import desc, asc
+from sqlalchemy import delete, func, literal_column, update
+from sqlalchemy.dialects.postgresql import insert
 
 from db.db import get_db
 from permissions import admin_only_permission
@@ -14,7 +22,21 @@ from service.schemas import (
     ServiceSchema, ServiceCreateSchema, ServiceUpdateSchema,
 )
 from user.schemas import ContractorSchema
-from service.utils import get_category_or_404, get_service_or_404
+from service.utils import (
+    get_category_or_404,
+    get_service_or_404,
+    get_cached_category_response,
+    cache_category_response,
+    clear_category_cache,
+)
+from utils.pagination import (
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    SortOrder,
+    paginate,
+    set_next_cursor,
+)
+from utils.responses import construct_from_orm, schema_list_response
 
 router = APIRouter()
 
@@ -24,26 +46,36 @@ router = APIRouter()
 async def get_service_categories(
         db: AsyncSession = Depends(get_db),
         skip: int = Query(0, ge=0),
-        limit: int = Query(10, gt=0),
-        sort_order: str = Query("asc", pattern="^(asc|desc)$")
+        limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE),
+        sort_order: SortOrder = Query("asc"),
+        after: Optional[str] = Query(None)
 ):
     """
     Получение списка категорий услуг.
     Доступно всем зарегистрированным пользователям.
     """
-    query = select(Category)
-
-    if sort_order == "desc":
-        query = query.order_by(desc(Category.name))
-    else:
-        query = query.order_by(asc(Category.name))
-
-    query = query.offset(skip).limit(limit)
+    cache_key = ("list", skip, limit, sort_order, after)
+    cached = get_cached_category_response(cache_key)
+    if cached is not None:
+        body, next_cursor = cached
+        response = Response(body, media_type="application/json")
+        if next_cursor is not None:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return response
+
+    query = paginate(select(Category), (Category.name, Category.id),
+                     sort_order, skip, limit, after)
 
     results = await db.execute(query)
     categories = results.scalars().all()
 
-    return categories
+    response = schema_list_response(CategorySchema, categories)
+    set_next_cursor(response, categories, limit,
+                    lambda category: (category.name, category.id))
+    cache_category_response(
+        cache_key, (response.body, response.headers.get(NEXT_CURSOR_HEADER))
+    )
+    return response
 
 
 @router.post("/service_categories",
@@ -54,19 +86,20 @@ async def create_service_category(category: CategoryCreateSchema,
     """
     Создание категории услуг. Доступно только админам.
     """
-    existing_category = await db.execute(
-        select(Category)
-        .where(Category.name == category.name)
+    # занятое имя отсекается уникальным индексом: при конфликте
+    # запрос не возвращает строку
+    new_category = await db.scalar(
+        insert(Category)
+        .values(**category.model_dump(exclude_unset=True))
+        .on_conflict_do_nothing(index_elements=[Category.name])
+        .returning(Category)
     )
-    if existing_category.scalars().first():
+    if new_category is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="Category with this name"
+                            detail="Category with this name "
                                    "already exists.")
-
-    new_category = Category(**category.model_dump(exclude_unset=True))
-
-    db.add(new_category)
     await db.commit()
+    clear_category_cache()
 
     return new_category
 
@@ -78,9 +111,15 @@ async def category_detail(category_id: int,
     """
     Получение деталей категории услуг.
     """
-    category = await get_category_or_404(category_id, db)
+    cache_key = ("detail", category_id)
+    body = get_cached_category_response(cache_key)
+    if body is None:
+        category = await get_category_or_404(category_id, db)
+        body = construct_from_orm(CategorySchema,
+                                  category).model_dump_json()
+        cache_category_response(cache_key, body)
 
-    return category
+    return Response(body, media_type="application/json")
 
 
 @router.patch("/service_categories/{category_id}",
@@ -92,17 +131,22 @@ async def update_category(category_id: int,
     """
     Обновление категори услуг. Доступно только админам.
     """
-    category = await get_category_or_404(category_id, db)
-
     category_update_data = data.model_dump(exclude_unset=True)
     if not category_update_data:
-        return category
-
-    for key, value in category_update_data.items():
-        setattr(category, key, value)
-
+        return await get_category_or_404(category_id, db)
+
+    category = await db.scalar(
+        update(Category)
+        .where(Category.id == category_id)
+        .values(**category_update_data)
+        .returning(Category)
+        .execution_options(populate_existing=True)
+    )
+    if category is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Category not found")
     await db.commit()
-    await db.refresh(category)
+    clear_category_cache()
 
     return category
 
@@ -115,11 +159,16 @@ async def delete_category(category_id: int,
     """
     Удаление категори услуг. Доступно только админам.
     """
-
-    category = await get_category_or_404(category_id, db)
-
-    await db.delete(category)
+    deleted_id = await db.scalar(
+        delete(Category)
+        .where(Category.id == category_id)
+        .returning(Category.id)
+    )
+    if deleted_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Category not found")
     await db.commit()
+    clear_category_cache()
 
 
 @router.get("/service_categories/{category_id}/services",
@@ -128,26 +177,27 @@ async def get_services_list_by_category(
         category_id: int,
         db: AsyncSession = Depends(get_db),
         skip: int = Query(0, ge=0),
-        limit: int = Query(10, gt=0),
-        sort_order: str = Query("asc", pattern="^(asc|desc)$")
+        limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE),
+        sort_order: SortOrder = Query("asc"),
+        after: Optional[str] = Query(None)
 ):
     """
     Получение списка услуг определенной категории.
     Доступно всем зарегистрированным пользователям.
     """
-    query = select(Service).where(Service.category_id == category_id)
-
-    if sort_order == "desc":
-        query = query.order_by(desc(Service.name))
-    else:
-        query = query.order_by(asc(Service.name))
-
-    query = query.offset(skip).limit(limit)
+    query = paginate(
+        select(Service).where(Service.category_id == category_id),
+        (Service.name, Service.id),
+        sort_order, skip, limit, after
+    )
 
     results = await db.execute(query)
     services = results.scalars().all()
 
-    return services
+    response = schema_list_response(ServiceSchema, services)
+    set_next_cursor(response, services, limit,
+                    lambda service: (service.name, service.id))
+    return response
 
 
 @router.post("/service_categories/{category_id}/services",
@@ -160,21 +210,17 @@ async def create_service(category_id: int,
     Создание услуги определенной категории.
     Доступно только админам.
     """
-    existing_service = await db.execute(
-        select(Service)
-        .where(Service.name == service.name)
+    new_service = await db.scalar(
+        insert(Service)
+        .values({**service.model_dump(exclude_unset=True),
+                 "category_id": category_id})
+        .on_conflict_do_nothing(index_elements=[Service.name])
+        .returning(Service)
     )
-    if existing_service.scalars().first():
+    if new_service is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="Service with this name"
+                            detail="Service with this name "
                                    "already exists.")
-
-    new_service = Service(
-        category_id=category_id,
-        **service.model_dump(exclude_unset=True)
-    )
-
-    db.add(new_service)
     await db.commit()
 
     return new_service
@@ -206,17 +252,22 @@ async def update_service(category_id: int,
     """
     Обновление деталей услуги. Доступно только админам.
     """
-    service = await get_service_or_404(category_id, service_id, db)
-
     service_update_data = data.model_dump(exclude_unset=True)
     if not service_update_data:
-        return service
-
-    for key, value in service_update_data.items():
-        setattr(service, key, value)
+        return await get_service_or_404(category_id, service_id, db)
 
+    service = await db.scalar(
+        update(Service)
+        .where(Service.id == service_id)
+        .where(Service.category_id == category_id)
+        .values(**service_update_data)
+        .returning(Service)
+        .execution_options(populate_existing=True)
+    )
+    if service is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Service item not found")
     await db.commit()
-    await db.refresh(service)
 
     return service
 
@@ -232,9 +283,15 @@ async def delete_service(category_id: int,
     """
     Удаление услуги. Доступно только админам.
     """
-    service = await get_service_or_404(category_id, service_id, db)
-
-    await db.delete(service)
+    deleted_id = await db.scalar(
+        delete(Service)
+        .where(Service.id == service_id)
+        .where(Service.category_id == category_id)
+        .returning(Service.id)
+    )
+    if deleted_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Service item not found")
     await db.commit()
 
 
@@ -246,32 +303,41 @@ async def get_contractors_by_service(
         service_id: int,
         db: AsyncSession = Depends(get_db),
         skip: int = Query(0, ge=0),
-        limit: int = Query(10, gt=0),
-        sort_order: str = Query("asc", pattern="^(asc|desc)$")
+        limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE),
+        sort_order: SortOrder = Query("asc"),
+        after: Optional[str] = Query(None)
 ):
     """
     Получение списка подрядчиков, оказывающих выбранную услугу.
     Сортировка по рейтингу. Доступно всем зарегистрированным пользователям.
     """
-    query = (
+    # подрядчики без рейтинга сортируются как имеющие рейтинг 0;
+    # 0 подставляется в SQL литералом, чтобы выражение совпало
+    # с индексом ix_contractor_rating
+    rating = func.coalesce(Contractor.average_rating, literal_column("0"))
+    query = paginate(
         select(Contractor)
-        .join(ContractorService)
-        .join(Service)
-        .join(Category)
-        .where(Service.id == service_id)
+        .where(Contractor.id.in_(
+            select(ContractorService.contractor_id)
+            .where(ContractorService.service_id == service_id)
+        )),
+        (rating, Contractor.id),
+        sort_order, skip, limit, after
     )
-    if sort_order == "desc":
-        query = query.order_by(desc(Contractor.average_rating))
-    else:
-        query = query.order_by(asc(Contractor.average_rating))
-
-    query = query.offset(skip).limit(limit)
 
     results = await db.execute(query)
     contractors = results.scalars().all()
 
-    if not contractors:
+    # пустая страница после последней - не ошибка, 404 возвращается,
+    # только если подрядчиков нет совсем
+    if not contractors and skip == 0 and after is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="No contractors found for the specified "
                                    "service in this category")
-    return contractors
+
+    response = schema_list_response(ContractorSchema, contractors)
+    set_next_cursor(
+        response, contractors, limit,
+        lambda contractor: (contractor.average_rating or 0, contractor.id)
+    )
+    return response
@@ -6,13 +6,10 @@ class CategoryCreateSchema(BaseModel):
     name: str
     description: Optional[str] = None
 
-    class Config:
-        from_attributes = True
-
 
 class CategorySchema(BaseModel):
     id: int
-    name: str = Field(..., min_length=3)
+    name: str
     description: Optional[str] = None
 
     class Config:
@@ -23,29 +20,20 @@ class CategoryUpdateSchema(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
 
-    class Config:
-        from_attributes = True
-
 
 class ServiceCreateSchema(BaseModel):
     name: str = Field(..., min_length=3)
     category_id: Optional[PositiveInt] = None
 
-    class Config:
-        from_attributes = True
-
 
 class ServiceUpdateSchema(BaseModel):
     name: Optional[str] = Field(None, min_length=3)
     category_id: Optional[PositiveInt] = None
 
-    class Config:
-        from_attributes = True
-
 
 class ServiceSchema(BaseModel):
     id: int
-    name: str = Field(..., min_length=3)
+    name: str
     category_id: PositiveInt
 
     class Config:
@@ -1,21 +1,51 @@
+import time
+from typing import Optional
+
 from fastapi import HTTPException, status
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.models import Category, Service
 
+# категории меняются только админами, поэтому готовые ответы со списком
+# и деталями категорий кэшируются в процессе на короткое время
+CATEGORY_CACHE_TTL = 60
+CATEGORY_CACHE_MAXSIZE = 1_000
+
+# ключ запроса -> (закэшированный ответ, время истечения)
+_category_cache: dict[tuple, tuple[object, float]] = {}
+
+
+def get_cached_category_response(key: tuple) -> Optional[object]:
+    cached = _category_cache.get(key)
+    if cached is None:
+        return None
+    value, valid_until = cached
+    if valid_until <= time.monotonic():
+        del _category_cache[key]
+        return None
+    return value
+
+
+def cache_category_response(key: tuple, value: object):
+    if len(_category_cache) >= CATEGORY_CACHE_MAXSIZE:
+        _category_cache.pop(next(iter(_category_cache)))
+    _category_cache[key] = (value, time.monotonic() + CATEGORY_CACHE_TTL)
+
+
+def clear_category_cache():
+    """
+    Сбрасывает кэш категорий после создания, изменения или удаления
+    категории.
+    """
+    _category_cache.clear()
+
 
 async def get_category_or_404(category_id: int, db: AsyncSession):
     """
     Получает категорию по ID или вызывает ошибку 404,
     если категория не найдена.
     """
-    result = await db.execute(
-        select(Category)
-        .where(Category.id == category_id)
-    )
-
-    category = result.scalars().first()
+    category = await db.get(Category, category_id)
     if category is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Category not found")
@@ -29,13 +59,8 @@ async def get_service_or_404(category_id: int,
     Получает услугу по ID услуги и ID категории
     или вызывает ошибку 404, если услуга не найдена.
     """
-    result = await db.execute(
-        select(Service)
-        .where(Service.category_id == category_id)
-        .where(Service.id == service_id)
-    )
-    service = result.scalars().first()
-    if service is None:
+    service = await db.get(Service, service_id)
+    if service is None or service.category_id != category_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Service item not found")
     return service
@@ -1,6 +1,9 @@
 import pytest
+from sqlalchemy import event
 from sqlalchemy.future import select
 
+from auth.auth import create_access_token, decode_token
+from auth.blacklist import hash_token
 from db.models import BlacklistedToken
 
 
@@ -28,6 +31,27 @@ async def test_login_user_not_found(client):
     assert response.json() == {"detail": "Incorrect email or password"}
 
 
+@pytest.mark.asyncio
+async def test_login_single_select(client, user, test_engine):
+    statements = []
+
+    def log_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute",
+                 log_statement)
+    try:
+        login_data = {"username": user.username, "password": "testpassword"}
+        response = await client.post("/login", data=login_data)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute",
+                     log_statement)
+
+    assert response.status_code == 200
+    selects = [s for s in statements if s.lstrip().startswith("SELECT")]
+    assert len(selects) == 1
+
+
 @pytest.mark.asyncio
 async def test_login_account_inactive(client, inactive_user):
 
@@ -69,7 +93,7 @@ async def test_logout(client, user, get_test_db):
 
         result = await t_db.execute(
             select(BlacklistedToken)
-            .where(BlacklistedToken.token == access_token)
+            .where(BlacklistedToken.token == hash_token(access_token))
         )
 
         blacklisted_access_token = result.scalars().first()
@@ -77,7 +101,7 @@ async def test_logout(client, user, get_test_db):
 
         result = await t_db.execute(
             select(BlacklistedToken)
-            .where(BlacklistedToken.token == refresh_token)
+            .where(BlacklistedToken.token == hash_token(refresh_token))
         )
 
         blacklisted_refresh_token = result.scalars().first()
@@ -101,3 +125,12 @@ async def test_auth_middleware_protected_endpoint_valid_token(client, user):
     response = await client.get("/contractors",
                                 cookies={"access_token": access_token})
     assert response.status_code == 200
+
+
+def test_decode_token_cached():
+    token = create_access_token({"user_id": 1, "is_active": True})
+
+    payload = decode_token(token)
+
+    assert payload["user_id"] == 1
+    assert decode_token(token) is payload
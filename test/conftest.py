@@ -1,5 +1,6 @@
 import asyncio
 import os
+from contextlib import asynccontextmanager
 
 import pytest
 import pytest_asyncio
@@ -11,7 +12,7 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
 )
 
-from db.db import Base, get_db
+from db.db import Base, get_db, get_db_ro
 from main import app
 from test.factories import UserFactory
 
@@ -54,15 +55,43 @@ async def setup_test_db():
 
 @pytest_asyncio.fixture
 async def get_test_db():
-    async with TestAsyncSessionLocal() as session:
+    # тест выполняется внутри внешней транзакции, которая откатывается
+    # после теста; commit в коде приложения фиксирует только SAVEPOINT
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = TestAsyncSessionLocal(
+            bind=connection,
+            join_transaction_mode="create_savepoint"
+        )
         yield session
-        await session.rollback()
+        await session.close()
+        await transaction.rollback()
+
+
+@pytest.fixture
+def test_engine():
+    """
+    Отдает движок тестовой базы данных. Тесты берут его через фикстуру,
+    а не импортом conftest: повторный импорт модуля под другим именем
+    создал бы второй, неиспользуемый движок.
+    """
+    return engine
+
+
+@asynccontextmanager
+async def shared_session(session: AsyncSession):
+    """
+    Отдает тестовую сессию, не закрывая ее на выходе: закрытие откатило
+    бы еще не зафиксированные данные теста.
+    """
+    yield session
 
 
 @pytest_asyncio.fixture
 async def client(get_test_db):
     app.dependency_overrides[get_db] = lambda: get_test_db
-    app.state.get_db_context = lambda: get_test_db
+    app.dependency_overrides[get_db_ro] = lambda: get_test_db
+    app.state.get_db_context = lambda: shared_session(get_test_db)
     async with AsyncClient(base_url="http://testserver",
                            transport=ASGITransport(app)) as async_client:
         yield async_client
@@ -75,6 +104,6 @@ async def user(get_test_db: AsyncSession):
 
 
 @pytest_asyncio.fixture
-async def inactive_user(get_test_db):
-    async with get_test_db as session:
-        return await UserFactory.create(session=session, is_active=False)
+async def inactive_user(get_test_db: AsyncSession):
+    user = await UserFactory.create(session=get_test_db, is_active=False)
+    yield user
@@ -1,3 +1,4 @@
+import bcrypt
 import factory
 import factory.fuzzy
 
@@ -7,11 +8,21 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from db.models import User, Contractor, ContractorService, PortfolioItem, \
     Review, Category, Service, Event, EventInvitation, EventInvitationStatus
 
-from auth.auth import hash_password
+from auth.auth import BCRYPT_ROUNDS
 from db.models import UserRole
 
 fake = Faker()
 
+# хэш вычисляется один раз и с текущим числом раундов, чтобы логин
+# в тестах не перехэшировал пароль
+TEST_PASSWORD_HASH = bcrypt.hashpw(
+    b"testpassword", bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+).decode()
+
+# тексты описаний не обязаны быть уникальными, поэтому берутся
+# по кругу из заранее сгенерированного набора
+TEXT_POOL = [fake.text(max_nb_chars=200) for _ in range(64)]
+
 
 class AsyncFactory(factory.Factory):
 
@@ -22,10 +33,16 @@ class AsyncFactory(factory.Factory):
     async def create(cls, session: AsyncSession, **kwargs):
         obj = cls.build(**kwargs)
         session.add(obj)
-        await session.commit()
-        await session.refresh(obj)
+        await session.flush()
         return obj
 
+    @classmethod
+    async def create_batch(cls, session: AsyncSession, size: int, **kwargs):
+        objs = cls.build_batch(size, **kwargs)
+        session.add_all(objs)
+        await session.flush()
+        return objs
+
 
 class UserFactory(AsyncFactory):
     class Meta:
@@ -33,7 +50,7 @@ class UserFactory(AsyncFactory):
 
     username = factory.Faker('user_name')
     email = factory.Faker('email')
-    password_hash = factory.LazyFunction(lambda: hash_password("testpassword"))
+    password_hash = TEST_PASSWORD_HASH
     name = factory.Faker('name')
     contact_data = factory.Faker('phone_number')
     role = factory.fuzzy.FuzzyChoice(list(UserRole))
@@ -45,7 +62,7 @@ class ContractorFactory(AsyncFactory):
         model = Contractor
 
     photo = factory.Faker('image_url')
-    description = factory.Faker('text', max_nb_chars=200)
+    description = factory.Iterator(TEXT_POOL)
     is_approved = factory.Faker('boolean', chance_of_getting_true=50)
     user = factory.SubFactory(UserFactory)
 
@@ -56,7 +73,7 @@ class ContractorServiceFactory(AsyncFactory):
 
     service_id = factory.Faker('random_int', min=1, max=100)
     contractor = factory.SubFactory(ContractorFactory)
-    description = factory.Faker('text', max_nb_chars=200)
+    description = factory.Iterator(TEXT_POOL)
     price = factory.Faker('random_number', digits=5)
 
 
@@ -67,7 +84,7 @@ class PortfolioItemFactory(AsyncFactory):
     contractor = factory.SubFactory(ContractorFactory)
     type = factory.Faker('word')
     url = factory.Faker('url')
-    description = factory.Faker('text', max_nb_chars=200)
+    description = factory.Iterator(TEXT_POOL)
 
 
 class ReviewFactory(AsyncFactory):
@@ -75,9 +92,9 @@ class ReviewFactory(AsyncFactory):
         model = Review
 
     contractor = factory.SubFactory(ContractorFactory)
-    user = factory.SubFactory(UserFactory)
-    rating = factory.Faker('random_number', digits=1)
-    comment = factory.Faker('text', nullable=True)
+    owner = factory.SubFactory(UserFactory)
+    rating = factory.Faker('random_int', min=0, max=5)
+    comment = factory.Iterator(TEXT_POOL)
 
 
 class CategoryFactory(AsyncFactory):
@@ -85,7 +102,7 @@ class CategoryFactory(AsyncFactory):
         model = Category
 
     name = factory.Faker('word')
-    description = factory.Faker('text', max_nb_chars=200)
+    description = factory.Iterator(TEXT_POOL)
 
 
 class ServiceFactory(AsyncFactory):
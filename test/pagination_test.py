@@ -0,0 +1,97 @@
+import base64
+import json
+
+import pytest
+import pytest_asyncio
+
+from test.factories import ContractorFactory, ReviewFactory
+from utils.pagination import NEXT_CURSOR_HEADER, encode_cursor
+
+# отзывы создаются в одной транзакции, поэтому created_at у них
+# совпадает и порядок внутри страницы определяет только id
+REVIEWS_COUNT = 7
+PAGE_SIZE = 3
+
+
+@pytest_asyncio.fixture
+async def access_token(client, user):
+    login_data = {"username": user.username, "password": "testpassword"}
+    login_response = await client.post("/login", data=login_data)
+    return login_response.cookies["access_token"]
+
+
+@pytest_asyncio.fixture
+async def reviews(get_test_db, user):
+    contractor = await ContractorFactory.create(session=get_test_db)
+    reviews = await ReviewFactory.create_batch(
+        get_test_db, REVIEWS_COUNT, contractor=contractor, owner=user
+    )
+    return reviews
+
+
+async def get_reviews_page(client, access_token, contractor_id, **params):
+    return await client.get(f"/contractors/{contractor_id}/reviews",
+                            params={"limit": PAGE_SIZE, **params},
+                            cookies={"access_token": access_token})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+async def test_cursor_pagination_without_gaps(client, access_token, reviews,
+                                              sort_order):
+    contractor_id = reviews[0].contractor_id
+    params = {"sort_order": sort_order}
+    page_sizes = []
+    received_ids = []
+
+    while True:
+        response = await get_reviews_page(client, access_token,
+                                          contractor_id, **params)
+        assert response.status_code == 200
+        page = response.json()
+        page_sizes.append(len(page))
+        received_ids.extend(review["id"] for review in page)
+
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+        params["after"] = cursor
+
+    expected_ids = sorted((review.id for review in reviews),
+                          reverse=sort_order == "desc")
+    assert received_ids == expected_ids
+    assert page_sizes == [3, 3, 1]
+
+
+@pytest.mark.asyncio
+async def test_next_cursor_only_on_full_page(client, access_token, reviews):
+    contractor_id = reviews[0].contractor_id
+
+    full_page = await get_reviews_page(client, access_token, contractor_id)
+    assert len(full_page.json()) == PAGE_SIZE
+    assert NEXT_CURSOR_HEADER in full_page.headers
+
+    short_page = await get_reviews_page(client, access_token, contractor_id,
+                                        skip=REVIEWS_COUNT - 1)
+    assert len(short_page.json()) == 1
+    assert NEXT_CURSOR_HEADER not in short_page.headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor",
+    encode_cursor(["2024-01-01T00:00:00+00:00", "1"])[:-4],
+    encode_cursor(["2024-01-01T00:00:00+00:00"]),
+    encode_cursor(["yesterday", "1"]),
+    encode_cursor(["2024-01-01T00:00:00+00:00", "first"]),
+    base64.urlsafe_b64encode(json.dumps(5).encode()).decode(),
+])
+async def test_malformed_cursor_returns_400(client, access_token, reviews,
+                                            cursor):
+    contractor_id = reviews[0].contractor_id
+
+    response = await get_reviews_page(client, access_token, contractor_id,
+                                      after=cursor)
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
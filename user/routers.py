@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import (
     APIRouter,
@@ -6,16 +6,21 @@ from fastapi import (
     HTTPException,
     status,
     Query,
-    BackgroundTasks,
 )
-from sqlalchemy import desc, asc, update
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import (
+    contains_eager,
+    joinedload,
+    raiseload,
+    selectinload,
+)
 
 from auth.auth import hash_password, get_current_user
 from db.db import get_db
-from mail.mail import send_email
+from mail.mail import queue_email
 from permissions import (
     admin_only_permission,
     admin_or_self_contractor_permission,
@@ -45,11 +50,49 @@ from user.utils import (
     get_review_or_404,
     get_portfolio_item_or_404,
     get_contractor_service_or_404, get_contractor_or_404,
+    update_contractor_rating,
+)
+from utils.pagination import (
+    MAX_PAGE_SIZE,
+    SortOrder,
+    paginate,
+    set_next_cursor,
+    set_total_count,
+    with_total_count,
 )
+from utils.responses import schema_list_response, schema_response
 
 router = APIRouter()
 
 
+async def _insert_user_or_400(db: AsyncSession,
+                              user: UserRegistrationSchema,
+                              role: UserRole,
+                              is_active: bool) -> int:
+    """
+    Создает пользователя одним запросом INSERT ... ON CONFLICT DO NOTHING
+    и возвращает его ID. Если пользователь с таким username или email уже
+    существует, вызывает ошибку 400.
+    """
+    user_id = await db.scalar(
+        insert(User)
+        .values(username=user.username,
+                email=user.email,
+                password_hash=await hash_password(user.password),
+                name=user.name,
+                contact_data=user.contact_data,
+                role=role,
+                is_active=is_active)
+        .on_conflict_do_nothing()
+        .returning(User.id)
+    )
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="User with this username or email "
+                                   "already exists.")
+    return user_id
+
+
 @router.post("/register/admin",
              dependencies=[Depends(admin_only_permission)])
 async def register_admin(user: UserRegistrationSchema,
@@ -59,29 +102,11 @@ async def register_admin(user: UserRegistrationSchema,
     Первый админ - superuser, создается в базе данных вручную.
     """
 
-    existing_user = await db.execute(
-        select(User).where(
-            (User.username == user.username) | (User.email == user.email))
-    )
-    if existing_user.scalars().first():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="User with this username or email "
-                                   "already exists.")
-
-    hashed_password = hash_password(user.password)
-
-    new_admin = User(username=user.username,
-                     email=user.email,
-                     password_hash=hashed_password,
-                     name=user.name,
-                     contact_data=user.contact_data,
-                     role=UserRole.ADMIN,
-                     is_active=True)
-    db.add(new_admin)
+    admin_id = await _insert_user_or_400(db, user, UserRole.ADMIN,
+                                         is_active=True)
     await db.commit()
-    await db.refresh(new_admin)
 
-    return {"msg": "Admin registered successfully", "user_id": new_admin.id}
+    return {"msg": "Admin registered successfully", "user_id": admin_id}
 
 
 @router.post("/register/user")
@@ -91,28 +116,10 @@ async def register_user(user: UserRegistrationSchema,
     Регистрация пользователя.
     """
 
-    existing_user = await db.execute(
-        select(User).where(
-            (User.username == user.username) | (User.email == user.email))
-    )
-    if existing_user.scalars().first():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="User with this username or email "
-                                   "already exists.")
-
-    hashed_password = hash_password(user.password)
-
-    new_user = User(username=user.username,
-                    email=user.email,
-                    password_hash=hashed_password,
-                    name=user.name,
-                    contact_data=user.contact_data,
-                    role=UserRole.USER,
-                    is_active=True)
-    db.add(new_user)
+    user_id = await _insert_user_or_400(db, user, UserRole.USER,
+                                        is_active=True)
     await db.commit()
-    await db.refresh(new_user)
-    return {"msg": "User registered successfully", "user_id": new_user.id}
+    return {"msg": "User registered successfully", "user_id": user_id}
 
 
 @router.get("/users",
@@ -121,23 +128,33 @@ async def register_user(user: UserRegistrationSchema,
 async def get_users(
         db: AsyncSession = Depends(get_db),
         skip: int = Query(0, ge=0),
-        limit: int = Query(10, gt=0),
-        sort_order: str = Query("asc", pattern="^(asc|desc)$")
+        limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE),
+        sort_order: SortOrder = Query("asc"),
+        after: Optional[str] = Query(None),
+        include_total: bool = Query(False)
 ):
     """
     Получение списка пользователей (заказчиков).
     Сортировка по дате последнего обновления. Доступно только админам.
     """
     query = select(User).where(User.role == UserRole.USER)
-    if sort_order == "desc":
-        query = query.order_by(desc(User.updated_at))
-    else:
-        query = query.order_by(asc(User.updated_at))
-    query = query.offset(skip).limit(limit)
-
-    results = await db.execute(query)
-    users = results.scalars().all()
-    return users
+    # общее число строк считается только по запросу: COUNT(*) OVER ()
+    # читает все подходящие строки до LIMIT. После курсора оно
+    # не отдается, так как посчитало бы лишь остаток
+    count_total = include_total and after is None
+    if count_total:
+        query = with_total_count(query)
+    query = paginate(query, (User.updated_at, User.id),
+                     sort_order, skip, limit, after)
+
+    rows = (await db.execute(query)).all()
+    users = [row[0] for row in rows]
+    response = schema_list_response(UserOutSchema, users)
+    if count_total:
+        set_total_count(response, rows)
+    set_next_cursor(response, users, limit,
+                    lambda user: (user.updated_at, user.id))
+    return response
 
 
 @router.get("/users/{user_id}", response_model=UserOutSchema)
@@ -147,7 +164,7 @@ async def user_detail(user_id: int,
     Получение деталей конкретного пользователя.
     Доступно только админам и самому пользователю.
     """
-    return user
+    return schema_response(UserOutSchema, user)
 
 
 @router.patch("/users/{user_id}", response_model=UserOutSchema)
@@ -160,15 +177,14 @@ async def update_user(user_id: int,
     Обновление данных пользователя (заказчика).
     Доступно только админам и самому пользователю.
     """
-    update_data = user_update.model_dump(exclude_unset=True)
-    if not update_data:
+    if not user_update.model_fields_set:
         return user
+    update_data = user_update.model_dump(exclude_unset=True)
 
     for key, value in update_data.items():
         setattr(user, key, value)
 
     await db.commit()
-    await db.refresh(user)
 
     return user
 
@@ -182,8 +198,8 @@ async def delete_user(user_id: int,
     Удаление пользователя.
     Доступно только админам и самому пользователю.
     """
-
-    await db.delete(user)
+    # связанные записи удаляются каскадно внешними ключами
+    await db.execute(delete(User).where(User.id == user.id))
     await db.commit()
 
 
@@ -197,64 +213,36 @@ async def register_contractor(contractor: ContractorRegistrationSchema,
     До подтверждения регистрации админом пользователь неактивен,
     статус подрядчика - не подтвержден.
     """
-    username = contractor.user.username
-    email = contractor.user.email
-
-    existing_user = await db.execute(
-        select(User).where(
-            (User.username == username) | (User.email == email))
-    )
-    if existing_user.scalars().first():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="User with this username or email "
-                                   "already exists.")
-
-    hashed_password = hash_password(contractor.user.password)
-    new_user = User(
-        username=username,
-        email=email,
-        password_hash=hashed_password,
-        name=contractor.user.name,
-        contact_data=contractor.user.contact_data,
-        role=UserRole.CONTRACTOR,
-        is_active=False
-    )
-    db.add(new_user)
-    await db.commit()
-    await db.refresh(new_user)
+    user_id = await _insert_user_or_400(db, contractor.user,
+                                        UserRole.CONTRACTOR, is_active=False)
 
+    # подрядчик, его услуги и портфолио создаются в той же транзакции:
+    # записи связаны через relationship, и один flush вставляет их
+    # в нужном порядке, объединяя строки каждой таблицы в пакетный INSERT
     new_contractor = Contractor(
-        user_id=new_user.id,
+        user_id=user_id,
         photo=contractor.photo,
         description=contractor.description,
-        is_approved=False
-    )
-    db.add(new_contractor)
-    await db.commit()
-    await db.refresh(new_contractor)
-
-    for service in contractor.services:
-        new_contractor_service = ContractorService(
-            service_id=service.service_id,
-            contractor_id=new_contractor.id,
-            description=service.description,
-            price=service.price
-        )
-        db.add(new_contractor_service)
-        await db.commit()
-        await db.refresh(new_contractor_service)
-
-    if contractor.portfolio_items:
-        for item in contractor.portfolio_items:
-            new_item = PortfolioItem(
-                contractor_id=new_contractor.id,
+        is_approved=False,
+        services=[
+            ContractorService(
+                service_id=service.service_id,
+                description=service.description,
+                price=service.price
+            )
+            for service in contractor.services
+        ],
+        portfolio_items=[
+            PortfolioItem(
                 type=item.type,
                 url=item.url,
                 description=item.description
             )
-            db.add(new_item)
-            await db.commit()
-            await db.refresh(new_item)
+            for item in contractor.portfolio_items or []
+        ]
+    )
+    db.add(new_contractor)
+    await db.commit()
 
     return {"msg": "Contractor registration submitted successfully",
             "contractor_id": new_contractor.id}
@@ -266,8 +254,10 @@ async def register_contractor(contractor: ContractorRegistrationSchema,
 async def get_contractor_applications(
         db: AsyncSession = Depends(get_db),
         skip: int = Query(0, ge=0),
-        limit: int = Query(10, gt=0),
-        sort_order: str = Query("asc", pattern="^(asc|desc)$")
+        limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE),
+        sort_order: SortOrder = Query("asc"),
+        after: Optional[str] = Query(None),
+        include_total: bool = Query(False)
 ):
     """
     Получение списка заявок на регистрацию подрядчиков.
@@ -277,18 +267,27 @@ async def get_contractor_applications(
         select(Contractor)
         .join(User)
         .where(Contractor.is_approved.is_(False))
-        .options(joinedload(Contractor.user))
+        # пользователь берется из уже присоединенной таблицы users,
+        # остальные связи схеме ответа не нужны
+        .options(contains_eager(Contractor.user), raiseload("*"))
     )
-    if sort_order == "desc":
-        query = query.order_by(desc(Contractor.created_at))
-    else:
-        query = query.order_by(asc(Contractor.created_at))
-    query = query.offset(skip).limit(limit)
+    # общее число строк считается только по запросу, как в get_users
+    count_total = include_total and after is None
+    if count_total:
+        query = with_total_count(query)
+    query = paginate(query, (Contractor.created_at, Contractor.id),
+                     sort_order, skip, limit, after)
 
-    results = await db.execute(query)
-    contractor_applications = results.scalars().all()
+    rows = (await db.execute(query)).all()
+    contractor_applications = [row[0] for row in rows]
+    response = schema_list_response(ContractorApplicationListSchema,
+                                    contractor_applications)
+    if count_total:
+        set_total_count(response, rows)
 
-    return contractor_applications
+    set_next_cursor(response, contractor_applications, limit,
+                    lambda contractor: (contractor.created_at, contractor.id))
+    return response
 
 
 @router.get("/contractor_applications/{contractor_id}",
@@ -300,23 +299,22 @@ async def contractor_application_detail(contractor_id: int,
     Получение деталей заявки на регистрацию подрядчика.
     Доступно только админам.
     """
-    result = await db.execute(
+    application = (await db.execute(
         select(Contractor)
         .where(Contractor.id == contractor_id)
         .options(
             joinedload(Contractor.user),
             selectinload(Contractor.services)
             .joinedload(ContractorService.service),
-            selectinload(Contractor.portfolio_items)
+            selectinload(Contractor.portfolio_items),
+            raiseload("*")
         )
-    )
-
-    application = result.scalars().first()
+    )).scalar_one_or_none()
     if application is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Contractor not found")
 
-    return application
+    return schema_response(ContractorApplicationSchema, application)
 
 
 @router.post(
@@ -324,7 +322,6 @@ async def contractor_application_detail(contractor_id: int,
     dependencies=[Depends(admin_only_permission)]
 )
 async def approve_contractor(contractor_id: int,
-                             background_tasks: BackgroundTasks,
                              db: AsyncSession = Depends(get_db)):
     """
     Одобрение регистрации подрядчика. Статус пользователя изменяется
@@ -336,8 +333,7 @@ async def approve_contractor(contractor_id: int,
     contractor.is_approved = True
     await db.commit()
 
-    background_tasks.add_task(
-        send_email,
+    queue_email(
         to=contractor.user.email,
         subject="Ваша заявка одобрена",
         template_name="approval_email.html",
@@ -352,7 +348,6 @@ async def approve_contractor(contractor_id: int,
     dependencies=[Depends(admin_only_permission)]
 )
 async def reject_contractor(contractor_id: int,
-                            background_tasks: BackgroundTasks,
                             db: AsyncSession = Depends(get_db)):
     """
     Отклонение регистрации подрядчика. Удаляется запись в таблице users,
@@ -361,16 +356,17 @@ async def reject_contractor(contractor_id: int,
     Доступно только админам.
     """
     contractor = await get_contractor_or_404(contractor_id, db)
+    email, name = contractor.user.email, contractor.user.name
 
-    background_tasks.add_task(
-        send_email,
-        to=contractor.user.email,
+    await db.execute(delete(User).where(User.id == contractor.user_id))
+    await db.commit()
+
+    queue_email(
+        to=email,
         subject="Ваша заявка отклонена",
         template_name="rejection_email.html",
-        context={"name": contractor.user.name}
+        context={"name": name}
     )
-    await db.delete(contractor.user)
-    await db.commit()
 
     return {"msg": "Contractor rejected and user record deleted"}
 
@@ -379,8 +375,9 @@ async def reject_contractor(contractor_id: int,
 async def get_contractors(
         db: AsyncSession = Depends(get_db),
         skip: int = Query(0, ge=0),
-        limit: int = Query(10, gt=0),
-        sort_order: str = Query("asc", pattern="^(asc|desc)$")
+        limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE),
+        sort_order: SortOrder = Query("asc"),
+        after: Optional[str] = Query(None)
 ):
     """
     Получение списка подрядчиков. Сортировка по имени.
@@ -390,17 +387,23 @@ async def get_contractors(
         select(Contractor)
         .join(User)
         .where(User.role == UserRole.CONTRACTOR)
-        .options(joinedload(Contractor.user))
+        # пользователь берется из уже присоединенной таблицы users:
+        # его имя нужно для курсора следующей страницы
+        .options(contains_eager(Contractor.user), raiseload("*"))
     )
-    if sort_order == "desc":
-        query = query.order_by(desc(User.name))
-    else:
-        query = query.order_by(asc(User.name))
-    query = query.offset(skip).limit(limit)
+    # ключ сортировки целиком из таблицы users (user_id у подрядчика
+    # уникален), чтобы переход по курсору шел по индексу
+    # ix_users_role_name
+    query = paginate(query, (User.name, User.id),
+                     sort_order, skip, limit, after)
 
     results = await db.execute(query)
     contractors = results.scalars().all()
-    return contractors
+    response = schema_list_response(ContractorSchema, contractors)
+    set_next_cursor(response, contractors, limit,
+                    lambda contractor: (contractor.user.name,
+                                        contractor.user_id))
+    return response
 
 
 @router.get("/contractors/{contractor_id}",
@@ -412,7 +415,7 @@ async def contractor_detail(contractor_id: int,
     Доступно всем зарегистрированным пльзователям.
     """
     contractor = await get_contractor_or_404(contractor_id, db)
-    return contractor
+    return schema_response(ContractorOutSchema, contractor)
 
 
 @router.patch("/contractors/{contractor_id}",
@@ -428,9 +431,9 @@ async def update_contractor(contractor_id: int,
     Доступно только админам и самому подрядчику.
     """
 
-    contractor_update_data = data.model_dump(exclude_unset=True)
-    if not contractor_update_data:
+    if not data.model_fields_set:
         return contractor
+    contractor_update_data = data.model_dump(exclude_unset=True)
 
     user_update_data = contractor_update_data.pop("user", None)
 
@@ -442,7 +445,6 @@ async def update_contractor(contractor_id: int,
             setattr(contractor.user, user_key, user_value)
 
     await db.commit()
-    await db.refresh(contractor)
 
     return contractor
 
@@ -457,9 +459,8 @@ async def delete_contractor(
     Удаление подрядчика и связанного пользователя.
     Доступно только админам и самому подрядчику.
     """
-
-    await db.delete(contractor)
-    await db.delete(contractor.user)
+    # подрядчик и его записи удаляются каскадно вместе с пользователем
+    await db.execute(delete(User).where(User.id == contractor.user_id))
     await db.commit()
 
 
@@ -474,11 +475,11 @@ async def get_contractor_services(contractor_id: int,
     results = await db.execute(
         select(ContractorService)
         .where(ContractorService.contractor_id == contractor_id)
-        .options(joinedload(ContractorService.service))
+        .options(joinedload(ContractorService.service), raiseload("*"))
     )
     services = results.scalars().all()
 
-    return services
+    return schema_list_response(ContractorServiceListSchema, services)
 
 
 @router.post("/contractors/{contractor_id}/services",
@@ -537,15 +538,14 @@ async def update_contractor_service(
         contractor.id, service_id, db
     )
 
-    service_update_data = data.model_dump(exclude_unset=True)
-    if not service_update_data:
+    if not data.model_fields_set:
         return service
+    service_update_data = data.model_dump(exclude_unset=True)
 
     for key, value in service_update_data.items():
         setattr(service, key, value)
 
     await db.commit()
-    await db.refresh(service)
 
     return service
 
@@ -561,11 +561,15 @@ async def delete_contractor_service(contractor_id: int,
     Удаление услуги подрядчика.
     Доступно админам и самому подрядчику.
     """
-    service = await get_contractor_service_or_404(
-        contractor.id, service_id, db
+    deleted_id = await db.scalar(
+        delete(ContractorService)
+        .where(ContractorService.id == service_id)
+        .where(ContractorService.contractor_id == contractor.id)
+        .returning(ContractorService.id)
     )
-
-    await db.delete(service)
+    if deleted_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Contractor service not found")
     await db.commit()
 
 
@@ -575,8 +579,9 @@ async def get_contractor_portfolio(
         contractor_id: int,
         db: AsyncSession = Depends(get_db),
         skip: int = Query(0, ge=0),
-        limit: int = Query(10, gt=0),
-        sort_order: str = Query("asc", pattern="^(asc|desc)$")
+        limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE),
+        sort_order: SortOrder = Query("asc"),
+        after: Optional[str] = Query(None)
 ):
     """
     Получение всего портфолио подрядчика.
@@ -586,17 +591,19 @@ async def get_contractor_portfolio(
     query = (
         select(PortfolioItem)
         .where(PortfolioItem.contractor_id == contractor_id)
+        # схема ответа содержит только столбцы
+        .options(raiseload("*"))
     )
-    if sort_order == "desc":
-        query = query.order_by(desc(PortfolioItem.updated_at))
-    else:
-        query = query.order_by(asc(PortfolioItem.updated_at))
-    query = query.offset(skip).limit(limit)
+    query = paginate(query, (PortfolioItem.updated_at, PortfolioItem.id),
+                     sort_order, skip, limit, after)
 
     results = await db.execute(query)
     portfolio = results.scalars().all()
 
-    return portfolio
+    response = schema_list_response(PortfolioItemSchema, portfolio)
+    set_next_cursor(response, portfolio, limit,
+                    lambda item: (item.updated_at, item.id))
+    return response
 
 
 @router.post("/contractors/{contractor_id}/portfolio",
@@ -657,19 +664,24 @@ async def update_portfolio_item(
     Обновление элемента портфолио подрядчика.
     Доступно админам и самому подрядчику.
     """
-    portfolio_item = await get_portfolio_item_or_404(
-        contractor.id, portfolio_item_id, db
-    )
-
+    if not data.model_fields_set:
+        return await get_portfolio_item_or_404(
+            contractor.id, portfolio_item_id, db
+        )
     portfolio_item_update_data = data.model_dump(exclude_unset=True)
-    if not portfolio_item_update_data:
-        return portfolio_item
-
-    for key, value in portfolio_item_update_data.items():
-        setattr(portfolio_item, key, value)
 
+    portfolio_item = await db.scalar(
+        update(PortfolioItem)
+        .where(PortfolioItem.id == portfolio_item_id)
+        .where(PortfolioItem.contractor_id == contractor.id)
+        .values(**portfolio_item_update_data)
+        .returning(PortfolioItem)
+        .execution_options(populate_existing=True)
+    )
+    if portfolio_item is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Portfolio item not found")
     await db.commit()
-    await db.refresh(portfolio_item)
 
     return portfolio_item
 
@@ -687,11 +699,15 @@ async def delete_portfolio_item(contractor_id: int,
     Удаление элемента портфолио подрядчика.
     Доступно админам и самому подрядчику.
     """
-    portfolio_item = await get_portfolio_item_or_404(
-        contractor.id, portfolio_item_id, db
+    deleted_id = await db.scalar(
+        delete(PortfolioItem)
+        .where(PortfolioItem.id == portfolio_item_id)
+        .where(PortfolioItem.contractor_id == contractor.id)
+        .returning(PortfolioItem.id)
     )
-
-    await db.delete(portfolio_item)
+    if deleted_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Portfolio item not found")
     await db.commit()
 
 
@@ -701,27 +717,30 @@ async def get_reviews_of_contractor(
         contractor_id: int,
         db: AsyncSession = Depends(get_db),
         skip: int = Query(0, ge=0),
-        limit: int = Query(10, gt=0),
-        sort_order: str = Query("asc", pattern="^(asc|desc)$")
+        limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE),
+        sort_order: SortOrder = Query("asc"),
+        after: Optional[str] = Query(None)
 ):
     """
     Получение списка отзывов на подрядчика. Сортировка по дате добавления.
     Доступно всем зарегистрированным пользователям.
     """
+    # схема ответа содержит только столбцы отзыва: они выбираются
+    # строками, без создания ORM-объектов
     query = (
-        select(Review)
+        select(Review.id, Review.user_id, Review.rating,
+               Review.comment, Review.created_at)
         .where(Review.contractor_id == contractor_id)
     )
-    if sort_order == "desc":
-        query = query.order_by(desc(Review.created_at))
-    else:
-        query = query.order_by(asc(Review.created_at))
-    query = query.offset(skip).limit(limit)
+    query = paginate(query, (Review.created_at, Review.id),
+                     sort_order, skip, limit, after)
 
-    results = await db.execute(query)
-    reviews = results.scalars().all()
+    reviews = (await db.execute(query)).all()
 
-    return reviews
+    response = schema_list_response(ReviewListSchema, reviews)
+    set_next_cursor(response, reviews, limit,
+                    lambda review: (review.created_at, review.id))
+    return response
 
 
 @router.post("/contractors/{contractor_id}/reviews",
@@ -743,22 +762,9 @@ async def create_review(
     )
 
     db.add(new_review)
-    await db.commit()
-
-    reviews_query = await db.execute(
-        select(Review)
-        .where(Review.contractor_id == contractor_id)
-    )
-    reviews = reviews_query.scalars().all()
-
-    total_ratings = sum(review.rating for review in reviews)
-    average_rating = total_ratings / len(reviews) if reviews else None
-
-    await db.execute(
-        update(Contractor)
-        .where(Contractor.id == contractor_id)
-        .values(average_rating=average_rating)
-    )
+    # отзыв вставляется при autoflush перед пересчетом рейтинга,
+    # оба изменения фиксируются одним коммитом
+    await update_contractor_rating(contractor_id, db)
     await db.commit()
 
     return new_review
@@ -791,20 +797,5 @@ async def delete_review(contractor_id: int,
     Доступно админам и автору отзыва.
     """
     await db.delete(review)
-    await db.commit()
-
-    reviews_query = await db.execute(
-        select(Review)
-        .where(Review.contractor_id == contractor_id)
-    )
-    reviews = reviews_query.scalars().all()
-
-    total_ratings = sum(review.rating for review in reviews)
-    average_rating = total_ratings / len(reviews) if reviews else None
-
-    await db.execute(
-        update(Contractor)
-        .where(Contractor.id == contractor_id)
-        .values(average_rating=average_rating)
-    )
+    await update_contractor_rating(contractor_id, db)
     await db.commit()
@@ -1,12 +1,16 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional, List
+from typing import Annotated, Optional, List
 
-from pydantic import BaseModel, EmailStr, Field, PositiveInt, condecimal
+from pydantic import BaseModel, EmailStr, Field, PositiveInt
 
 from db.models import UserRole
 from service.schemas import ServiceSchema
 
+# оценка в формате столбца DECIMAL(3, 2): от 0 до 5
+Rating = Annotated[Decimal, Field(max_digits=3, decimal_places=2,
+                                  ge=0, le=5)]
+
 
 class UserRegistrationSchema(BaseModel):
     username: str = Field(..., min_length=3)
@@ -15,14 +19,13 @@ class UserRegistrationSchema(BaseModel):
     name: str = Field(..., min_length=3)
     contact_data: Optional[str] = None
 
-    class Config:
-        from_attributes = True
-
 
 class UserOutSchema(BaseModel):
     id: PositiveInt
     username: str = Field(..., min_length=3)
-    email: EmailStr
+    # адрес уже проверен при регистрации или обновлении, повторная
+    # проверка EmailStr в каждом ответе не нужна
+    email: str
     name: str = Field(..., min_length=3)
     role: UserRole
     contact_data: Optional[str] = None
@@ -40,14 +43,11 @@ class UserUpdateSchema(BaseModel):
     contact_data: Optional[str] = None
     is_active: Optional[bool] = None
 
-    class Config:
-        from_attributes = True
-
 
 class ReviewListSchema(BaseModel):
     id: PositiveInt
     user_id: PositiveInt
-    rating: Decimal
+    rating: Rating
     comment: Optional[str] = None
     created_at: datetime
 
@@ -56,18 +56,15 @@ class ReviewListSchema(BaseModel):
 
 
 class ReviewCreateSchema(BaseModel):
-    rating: Decimal
+    rating: Rating
     comment: Optional[str] = None
 
-    class Config:
-        from_attributes = True
-
 
 class ReviewSchema(BaseModel):
     id: PositiveInt
     contractor_id: PositiveInt
     user_id: PositiveInt
-    rating: Decimal
+    rating: Rating
     comment: Optional[str] = None
     created_at: datetime
 
@@ -85,8 +82,8 @@ class ContractorServiceListSchema(BaseModel):
 
 class ContractorServiceSchema(BaseModel):
     service: ServiceSchema
-    description: str = Field(..., min_length=5)
-    price: str = Field(..., min_length=3)
+    description: str
+    price: str
 
     class Config:
         from_attributes = True
@@ -98,23 +95,17 @@ class ContractorServiceCreateSchema(BaseModel):
     description: str = Field(..., min_length=5)
     price: str = Field(..., min_length=3)
 
-    class Config:
-        from_attributes = True
-
 
 class ContractorServiceUpdateSchema(BaseModel):
     description: Optional[str] = Field(None, min_length=5)
     price: Optional[str] = Field(None, min_length=3)
 
-    class Config:
-        from_attributes = True
-
 
 class PortfolioItemSchema(BaseModel):
     id: PositiveInt
     type: str
     url: str
-    description: str = Field(..., min_length=5)
+    description: str
     updated_at: datetime
 
     class Config:
@@ -127,18 +118,12 @@ class PortfolioItemAddSchema(BaseModel):
     url: str
     description: str = Field(..., min_length=5)
 
-    class Config:
-        from_attributes = True
-
 
 class PortfolioItemUpdateSchema(BaseModel):
     type: Optional[str] = None
     url: Optional[str] = None
     description: Optional[str] = Field(None, min_length=5)
 
-    class Config:
-        from_attributes = True
-
 
 class ContractorRegistrationSchema(BaseModel):
     user: UserRegistrationSchema
@@ -147,9 +132,6 @@ class ContractorRegistrationSchema(BaseModel):
     services: List[ContractorServiceCreateSchema]
     portfolio_items: Optional[List[PortfolioItemAddSchema]] = None
 
-    class Config:
-        from_attributes = True
-
 
 class ContractorApplicationListSchema(BaseModel):
     id: PositiveInt
@@ -182,7 +164,7 @@ class ContractorSchema(BaseModel):
     description: str
     is_approved: bool
     created_at: datetime
-    average_rating: condecimal(max_digits=3, decimal_places=2) | None
+    average_rating: Optional[Rating]
 
     class Config:
         from_attributes = True
@@ -196,7 +178,7 @@ class ContractorOutSchema(BaseModel):
     is_approved: bool
     created_at: datetime
     updated_at: datetime
-    average_rating: condecimal(max_digits=3, decimal_places=2) | None
+    average_rating: Optional[Rating]
     services: List[ContractorServiceSchema]
     portfolio_items: Optional[List[PortfolioItemSchema]] = []
 
@@ -209,6 +191,3 @@ class ContractorUpdateSchema(BaseModel):
     photo: Optional[str] = None
     description: Optional[str] = None
     is_approved: Optional[bool] = None
-
-    class Config:
-        from_attributes = True
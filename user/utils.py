@@ -1,4 +1,5 @@
 from fastapi import HTTPException, status
+from sqlalchemy import func, update
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
@@ -17,8 +18,7 @@ async def get_user_or_404(user_id: int, db: AsyncSession):
     Получает пользователя по ID или вызывает ошибку 404,
     если пользователь не найден.
     """
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
+    user = await db.get(User, user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Contractor not found")
@@ -28,21 +28,18 @@ async def get_user_or_404(user_id: int, db: AsyncSession):
 async def get_contractor_or_404(contractor_id: int, db: AsyncSession):
     """
     Получает подрядчика по ID или вызывает ошибку 404,
-    если подрядчик не найден.
+    если подрядчик не найден. Подрядчик берется из identity map сессии
+    запроса, если уже был загружен.
     """
-
-    result = await db.execute(
-        select(Contractor)
-        .where(Contractor.id == contractor_id)
-        .options(
+    contractor = await db.get(
+        Contractor, contractor_id,
+        options=[
             joinedload(Contractor.user),
             selectinload(Contractor.services)
             .joinedload(ContractorService.service),
             selectinload(Contractor.portfolio_items)
-        )
+        ]
     )
-
-    contractor = result.scalars().first()
     if contractor is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -51,6 +48,21 @@ async def get_contractor_or_404(contractor_id: int, db: AsyncSession):
     return contractor
 
 
+async def ensure_contractor_exists(contractor_id: int, db: AsyncSession):
+    """
+    Проверяет, что подрядчик существует, или вызывает ошибку 404.
+    Загружается только ID, без объекта подрядчика и его связей.
+    """
+    found_id = await db.scalar(
+        select(Contractor.id).where(Contractor.id == contractor_id)
+    )
+    if found_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Contractor not found"
+        )
+
+
 async def get_contractor_service_or_404(contractor_id: int,
                                         service_id: int,
                                         db: AsyncSession):
@@ -58,14 +70,11 @@ async def get_contractor_service_or_404(contractor_id: int,
     Получает услугу подрядчика по ID подрядчика и ID услуги
     или вызывает ошибку 404, если услуга не найдена.
     """
-    result = await db.execute(
-        select(ContractorService)
-        .where(ContractorService.contractor_id == contractor_id)
-        .where(ContractorService.id == service_id)
-        .options(joinedload(ContractorService.service))
+    service = await db.get(
+        ContractorService, service_id,
+        options=[joinedload(ContractorService.service)]
     )
-    service = result.scalars().first()
-    if service is None:
+    if service is None or service.contractor_id != contractor_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Contractor service not found")
     return service
@@ -78,13 +87,11 @@ async def get_portfolio_item_or_404(contractor_id: int,
     Получает элемент потрфолио по ID и по ID подрядчика
     или вызывает ошибку 404, если элемент потрфолио не найден.
     """
-    result = await db.execute(
-        select(PortfolioItem)
-        .where(PortfolioItem.contractor_id == contractor_id)
-        .where(PortfolioItem.id == portfolio_item_id)
-    )
-    portfolio_item = result.scalars().first()
-    if portfolio_item is None:
+    portfolio_item = await db.get(PortfolioItem, portfolio_item_id)
+    if (
+            portfolio_item is None
+            or portfolio_item.contractor_id != contractor_id
+    ):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Portfolio item not found")
     return portfolio_item
@@ -97,13 +104,32 @@ async def get_review_or_404(contractor_id: int,
     Получает отзыв по ID и по ID подрядчика или вызывает ошибку 404,
     если отзыв не найден.
     """
-    result = await db.execute(
-        select(Review)
-        .where(Review.contractor_id == contractor_id)
-        .where(Review.id == review_id)
-    )
-    review = result.scalars().first()
-    if review is None:
+    review = await db.get(Review, review_id)
+    if review is None or review.contractor_id != contractor_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Review not found")
     return review
+
+
+async def update_contractor_rating(contractor_id: int, db: AsyncSession):
+    """
+    Пересчитывает средний рейтинг подрядчика по его отзывам. Среднее
+    вычисляется в базе данных, отзывы в приложение не загружаются.
+    """
+    # строка подрядчика блокируется отдельным запросом: UPDATE ниже
+    # получает снимок данных уже после того, как параллельная транзакция
+    # с другим отзывом зафиксирована, и учитывает ее отзыв
+    await db.execute(
+        select(Contractor.id)
+        .where(Contractor.id == contractor_id)
+        .with_for_update()
+    )
+    await db.execute(
+        update(Contractor)
+        .where(Contractor.id == contractor_id)
+        .values(average_rating=(
+            select(func.avg(Review.rating))
+            .where(Review.contractor_id == contractor_id)
+            .scalar_subquery()
+        ))
+    )
@@ -0,0 +1,106 @@
+import base64
+import json
+from datetime import datetime
+from typing import Callable, Literal, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, asc, bindparam, desc, func, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+# наибольший размер страницы: ограничивает число объектов, которые
+# список загружает и сериализует за один запрос
+MAX_PAGE_SIZE = 100
+
+SortOrder = Literal["asc", "desc"]
+SORT_ORDERS = {"asc": asc, "desc": desc}
+
+
+def encode_cursor(values: Sequence) -> str:
+    """
+    Кодирует значения ключа сортировки последней строки страницы
+    в непрозрачный курсор.
+    """
+    data = json.dumps([str(value) for value in values])
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor: str, keys: Sequence) -> tuple:
+    """
+    Раскодирует курсор в значения ключа сортировки с типами столбцов
+    keys. Если курсор поврежден, вызывает ошибку 400.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(keys):
+            raise ValueError
+        result = []
+        for key, value in zip(keys, values):
+            python_type = key.type.python_type
+            if python_type is datetime:
+                result.append(datetime.fromisoformat(value))
+            else:
+                result.append(python_type(value))
+        return tuple(result)
+    except (ValueError, TypeError, ArithmeticError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Invalid cursor")
+
+
+def paginate(query: Select,
+             keys: Sequence,
+             sort_order: SortOrder,
+             skip: int,
+             limit: int,
+             after: Optional[str] = None) -> Select:
+    """
+    Добавляет к запросу сортировку по keys (последним должен быть
+    первичный ключ) и пагинацию. С курсором after выборка продолжается
+    со строки, следующей за ним (keyset-пагинация, без OFFSET),
+    иначе используется смещение skip.
+    """
+    order = SORT_ORDERS[sort_order]
+    query = query.order_by(*(order(key) for key in keys))
+
+    if after is not None:
+        cursor_values = decode_cursor(after, keys)
+        values = tuple_(*(bindparam(None, value, type_=key.type)
+                          for key, value in zip(keys, cursor_values)))
+        if sort_order == "desc":
+            query = query.where(tuple_(*keys) < values)
+        else:
+            query = query.where(tuple_(*keys) > values)
+    else:
+        query = query.offset(skip)
+
+    return query.limit(limit)
+
+
+def set_next_cursor(response: Response,
+                    rows: Sequence,
+                    limit: int,
+                    key: Callable[..., Sequence]):
+    """
+    Передает в заголовке ответа курсор следующей страницы, если текущая
+    страница заполнена целиком.
+    """
+    if len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(rows[-1]))
+
+
+def with_total_count(query: Select) -> Select:
+    """
+    Добавляет к запросу столбец total_count с числом всех строк,
+    подходящих под условия запроса. COUNT(*) OVER () вычисляется до
+    LIMIT/OFFSET, поэтому отдельный запрос COUNT(*) не нужен.
+    """
+    return query.add_columns(func.count().over().label("total_count"))
+
+
+def set_total_count(response: Response, rows: Sequence):
+    """
+    Передает в заголовке ответа общее число строк из столбца total_count.
+    Если страница пуста, число строк неизвестно и заголовок не ставится.
+    """
+    if rows:
+        response.headers[TOTAL_COUNT_HEADER] = str(rows[0].total_count)
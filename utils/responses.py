@@ -0,0 +1,95 @@
+from functools import lru_cache
+from types import UnionType
+from typing import List, Optional, Union, get_args, get_origin
+
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse as BaseORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+
+class ORJSONResponse(BaseORJSONResponse):
+    """
+    JSON-ответ через orjson с единым форматом времени: даты с часовым
+    поясом UTC выводятся с суффиксом "Z", даты без часового пояса
+    считаются UTC.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            option=(orjson.OPT_NON_STR_KEYS
+                    | orjson.OPT_SERIALIZE_NUMPY
+                    | orjson.OPT_UTC_Z
+                    | orjson.OPT_NAIVE_UTC),
+        )
+
+
+def _nested_schema(annotation) -> tuple[Optional[type], bool]:
+    """
+    Определяет вложенную схему поля: возвращает класс схемы и признак
+    списка для аннотаций вида Schema, List[Schema] и их Optional-вариантов.
+    """
+    origin = get_origin(annotation)
+    if origin is Union or origin is UnionType:
+        for arg in get_args(annotation):
+            if arg is not type(None):
+                return _nested_schema(arg)
+        return None, False
+    if origin is list:
+        schema, _ = _nested_schema(get_args(annotation)[0])
+        return schema, schema is not None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+
+@lru_cache(maxsize=None)
+def _schema_fields(schema: type[BaseModel]) -> tuple:
+    return tuple(
+        (name, *_nested_schema(field.annotation))
+        for name, field in schema.model_fields.items()
+    )
+
+
+def construct_from_orm(schema: type[BaseModel], obj):
+    """
+    Собирает схему из ORM-объекта или строки запроса через
+    model_construct, без валидации.
+    Подходит только для данных, прочитанных из базы данных: они уже
+    соответствуют схеме, и повторная проверка каждого поля не нужна.
+    """
+    data = {}
+    for name, nested, is_list in _schema_fields(schema):
+        value = getattr(obj, name)
+        if nested is not None and value is not None:
+            if is_list:
+                value = [construct_from_orm(nested, item) for item in value]
+            else:
+                value = construct_from_orm(nested, value)
+        data[name] = value
+    return schema.model_construct(**data)
+
+
+def schema_response(schema: type[BaseModel], obj) -> Response:
+    """
+    Сериализует ORM-объект по схеме сразу в JSON, минуя валидацию
+    и повторную обработку response_model в FastAPI.
+    """
+    return Response(construct_from_orm(schema, obj).model_dump_json(),
+                    media_type="application/json")
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+def schema_list_response(schema: type[BaseModel], rows) -> Response:
+    """
+    Сериализует список ORM-объектов или строк запроса по схеме сразу
+    в JSON, минуя валидацию и повторную обработку response_model в FastAPI.
+    """
+    items = [construct_from_orm(schema, row) for row in rows]
+    return Response(_list_adapter(schema).dump_json(items),
+                    media_type="application/json")